@@ -1,5 +1,6 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from jinja2 import FileSystemBytecodeCache
 import os
 from config import Config
 
@@ -13,6 +14,10 @@ def create_app(config_class=Config):
     # Initialize extensions
     db.init_app(app)
     
+    # Keep compiled page templates on disk so a restarted worker doesn't
+    # parse them again
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+    
     # Create upload folder if it doesn't exist
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
@@ -1,15 +1,78 @@
 import hashlib
 import hmac
-import base64
+import binascii
 import time
 import json
+import functools
+import threading
 from datetime import datetime
 import os
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric import rsa, padding, ed25519
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.backends import default_backend
 from flask import current_app, session
 
+# HMAC-SHA256 should dispatch to OpenSSL (SHA-NI/AVX2 assembly) rather than
+# CPython's portable built-in SHA-256, which is several times slower
+try:
+    import _hashlib
+    OPENSSL_SHA256 = hashlib.sha256 is _hashlib.openssl_sha256
+except (ImportError, AttributeError):
+    OPENSSL_SHA256 = False
+
+if not OPENSSL_SHA256:
+    print("Warning: hashlib.sha256 is not backed by OpenSSL, HMAC signatures will be slow")
+
+# Shared encoder for signature payloads. Its settings must stay identical to
+# json.dumps(data, sort_keys=True), which the verify route uses to rebuild
+# the signed string.
+_encode_signature_data = json.JSONEncoder(sort_keys=True).encode
+
+# LaTeX special characters and their escaped forms; str.translate applies
+# them in a single pass, so the backslashes they introduce are never escaped
+# again
+_TEX_TABLE = str.maketrans({
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\^{}',
+    '\\': r'\textbackslash{}',
+    '<': r'\textless{}',
+    '>': r'\textgreater{}',
+})
+
+# Signature block for LaTeX documents, filled in by format_signature_for_latex
+_LATEX_SIGNATURE_TEMPLATE = """\\begin{{center}}
+\\framebox{{
+\\begin{{minipage}}{{0.8\\textwidth}}
+\\textbf{{Digital Signature}}\\\\
+Signed by: {username}\\\\
+Date and Time: {timestamp}\\\\
+Method: {algorithm}\\\\
+Signature: {signature}\\\\
+\\end{{minipage}}
+}}
+\\end{{center}}"""
+
+# Process-wide instance, so the keys are parsed once rather than per request
+_instance = None
+_instance_lock = threading.Lock()
+
+def get_digital_signature():
+    """Get the shared DigitalSignature instance, creating it on first use"""
+    global _instance
+    if _instance is None:
+        # Lock so concurrent first requests don't both load or generate keys
+        with _instance_lock:
+            if _instance is None:
+                _instance = DigitalSignature()
+    return _instance
+
 class DigitalSignature:
     def __init__(self):
         """Initialize the digital signature system"""
@@ -17,30 +80,85 @@ class DigitalSignature:
         # For this example, we'll generate keys on initialization
         self.private_key_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'keys', 'private_key.pem')
         self.public_key_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'keys', 'public_key.pem')
+        # DER copy of the private key, which loads faster than the PEM
+        self.private_key_der_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'keys', 'private_key.der')
+        self.ed25519_key_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'keys', 'ed25519_private_key.pem')
+        self.ed25519_public_key_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'keys', 'ed25519_public_key.pem')
         
         # Create keys directory if it doesn't exist
         os.makedirs(os.path.dirname(self.private_key_path), exist_ok=True)
         
         # Generate or load keys
         self._load_or_generate_keys()
+        self._load_or_generate_ed25519_key()
+        
+        # Padding and hash objects are stateless, so build them once and
+        # reuse them for every RSA signature and verification
+        self._hash_algo = hashes.SHA256()
+        self._pss = padding.PSS(
+            mgf=padding.MGF1(self._hash_algo),
+            # Salt as long as the hash, rather than the maximum
+            salt_length=hashes.SHA256.digest_size
+        )
+        # Read the salt length from the signature, so both 32-byte and
+        # older maximum-length salts verify
+        self._pss_verify = padding.PSS(
+            mgf=padding.MGF1(self._hash_algo),
+            salt_length=padding.PSS.AUTO
+        )
+        
+        # Bind the sign/verify callables once so the hot path skips the
+        # attribute lookups on every signature
+        if self.private_key:
+            self._signer = functools.partial(
+                self.private_key.sign,
+                padding=self._pss,
+                algorithm=self._hash_algo
+            )
+        else:
+            self._signer = None
+        self._verifier = self.public_key.verify if self.public_key else None
+        
+        # Encoded HMAC fallback key, read from the app config on first use
+        self._hmac_key = None
+    
+    def _get_hmac_key(self):
+        """Get the HMAC fallback key, looking it up in the app config only once"""
+        if self._hmac_key is None:
+            # In a real application, you'd use a secure key stored in an environment variable
+            self._hmac_key = current_app.config.get('SECRET_KEY', 'fallback-secret').encode('utf-8')
+        return self._hmac_key
     
     def _load_or_generate_keys(self):
         """Load existing keys or generate new ones if they don't exist"""
         try:
             if os.path.exists(self.private_key_path) and os.path.exists(self.public_key_path):
-                # Load existing keys
-                with open(self.private_key_path, "rb") as key_file:
-                    self.private_key = serialization.load_pem_private_key(
-                        key_file.read(),
-                        password=None,
-                        backend=default_backend()
-                    )
-                
-                with open(self.public_key_path, "rb") as key_file:
-                    self.public_key = serialization.load_pem_public_key(
-                        key_file.read(),
-                        backend=default_backend()
-                    )
+                if (os.path.exists(self.private_key_der_path) and
+                        os.path.getmtime(self.private_key_der_path) >= os.path.getmtime(self.private_key_path)):
+                    # Load the DER cache, skipping base64 and PEM header parsing
+                    with open(self.private_key_der_path, "rb") as key_file:
+                        self.private_key = serialization.load_der_private_key(
+                            key_file.read(),
+                            password=None,
+                            backend=default_backend()
+                        )
+                    self.public_key = self.private_key.public_key()
+                else:
+                    # Load existing keys
+                    with open(self.private_key_path, "rb") as key_file:
+                        self.private_key = serialization.load_pem_private_key(
+                            key_file.read(),
+                            password=None,
+                            backend=default_backend()
+                        )
+                    
+                    with open(self.public_key_path, "rb") as key_file:
+                        self.public_key = serialization.load_pem_public_key(
+                            key_file.read(),
+                            backend=default_backend()
+                        )
+                    
+                    self._write_private_key_der()
                 
                 print("Loaded existing signature keys")
             else:
@@ -69,6 +187,8 @@ class DigitalSignature:
                 with open(self.public_key_path, 'wb') as f:
                     f.write(pem)
                 
+                self._write_private_key_der()
+                
                 print("Generated new signature keys")
         except Exception as e:
             print(f"Error managing signature keys: {str(e)}")
@@ -76,6 +196,58 @@ class DigitalSignature:
             self.private_key = None
             self.public_key = None
     
+    def _write_private_key_der(self):
+        """Cache the private key as DER so later startups can skip PEM parsing"""
+        try:
+            der = self.private_key.private_bytes(
+                encoding=serialization.Encoding.DER,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption()
+            )
+            with open(self.private_key_der_path, 'wb') as f:
+                f.write(der)
+        except Exception as e:
+            # The PEM file is still used, just more slowly
+            print(f"Error caching signature key as DER: {str(e)}")
+    
+    def _load_or_generate_ed25519_key(self):
+        """Load the Ed25519 signing key or generate one if it doesn't exist"""
+        try:
+            if os.path.exists(self.ed25519_key_path):
+                with open(self.ed25519_key_path, "rb") as key_file:
+                    self.ed_private_key = serialization.load_pem_private_key(
+                        key_file.read(),
+                        password=None
+                    )
+            else:
+                self.ed_private_key = ed25519.Ed25519PrivateKey.generate()
+                
+                # Save private key
+                pem = self.ed_private_key.private_bytes(
+                    encoding=serialization.Encoding.PEM,
+                    format=serialization.PrivateFormat.PKCS8,
+                    encryption_algorithm=serialization.NoEncryption()
+                )
+                with open(self.ed25519_key_path, 'wb') as f:
+                    f.write(pem)
+            
+            self.ed_public_key = self.ed_private_key.public_key()
+            
+            # Save public key, so signatures can be checked outside the app;
+            # keys generated before it was exported get it written now
+            if not os.path.exists(self.ed25519_public_key_path):
+                pem = self.ed_public_key.public_bytes(
+                    encoding=serialization.Encoding.PEM,
+                    format=serialization.PublicFormat.SubjectPublicKeyInfo
+                )
+                with open(self.ed25519_public_key_path, 'wb') as f:
+                    f.write(pem)
+        except Exception as e:
+            print(f"Error managing Ed25519 signature key: {str(e)}")
+            # RSA-PSS (or HMAC) is used for new signatures instead
+            self.ed_private_key = None
+            self.ed_public_key = None
+    
     def create_timestamp(self):
         """Create a secure timestamp with current time"""
         timestamp = datetime.utcnow().isoformat()
@@ -100,23 +272,31 @@ class DigitalSignature:
             'data': additional_data
         }
         
-        # Convert to JSON string
-        data_json = json.dumps(data, sort_keys=True)
+        # Convert to JSON bytes once for whichever signing path is used
+        data_bytes = _encode_signature_data(data).encode('utf-8')
         
         try:
-            if self.private_key:
-                # Create RSA signature
-                signature = self.private_key.sign(
-                    data_json.encode('utf-8'),
-                    padding.PSS(
-                        mgf=padding.MGF1(hashes.SHA256()),
-                        salt_length=padding.PSS.MAX_LENGTH
-                    ),
-                    hashes.SHA256()
-                )
+            if self.ed_private_key:
+                # Create Ed25519 signature, much cheaper than RSA modexp
+                signature = self.ed_private_key.sign(data_bytes)
+                
+                # Base64 encode for storage and display
+                signature_b64 = binascii.b2a_base64(signature, newline=False).decode('ascii')
+                
+                return {
+                    'username': username,
+                    'timestamp': timestamp,
+                    'data': additional_data,
+                    'signature': signature_b64,
+                    'algorithm': 'Ed25519',
+                    'verification': f"To verify: Use Ed25519"
+                }
+            elif self._signer:
+                # Create RSA signature (OpenSSL uses the CRT key components)
+                signature = self._signer(data_bytes)
                 
                 # Base64 encode for storage and display
-                signature_b64 = base64.b64encode(signature).decode('utf-8')
+                signature_b64 = binascii.b2a_base64(signature, newline=False).decode('ascii')
                 
                 return {
                     'username': username,
@@ -124,19 +304,19 @@ class DigitalSignature:
                     'data': additional_data,
                     'signature': signature_b64,
                     'algorithm': 'RSA-PSS',
-                    'verification': f"To verify: Use RSA-PSS with SHA-256"
+                    'salt_length': hashes.SHA256.digest_size,
+                    'verification': f"To verify: Use RSA-PSS with SHA-256 and a {hashes.SHA256.digest_size}-byte salt"
                 }
             else:
                 # Fallback to HMAC
-                # In a real application, you'd use a secure key stored in an environment variable
-                secret_key = current_app.config.get('SECRET_KEY', 'fallback-secret').encode('utf-8')
+                secret_key = self._get_hmac_key()
                 
-                # Create HMAC signature
-                signature = hmac.new(
+                # Create HMAC signature (one-shot C implementation)
+                signature = hmac.digest(
                     secret_key,
-                    data_json.encode('utf-8'),
-                    hashlib.sha256
-                ).hexdigest()
+                    data_bytes,
+                    'sha256'
+                ).hex()
                 
                 return {
                     'username': username,
@@ -158,46 +338,53 @@ class DigitalSignature:
                 'error': str(e)
             }
     
-    def verify_signature(self, data, signature_b64):
+    def verify_signature(self, data, signature_b64, algorithm=None):
         """
         Verify a digital signature
         
         Args:
             data: The original data that was signed (as JSON string)
             signature_b64: The base64-encoded signature
+            algorithm: The algorithm recorded with the signature, if known
             
         Returns:
             Boolean indicating if signature is valid
         """
         try:
-            if self.public_key:
+            if self.ed_public_key or self._verifier:
                 # Decode the signature
-                signature = base64.b64decode(signature_b64)
+                signature = binascii.a2b_base64(signature_b64)
                 
-                # Verify the signature
-                self.public_key.verify(
+                if algorithm is None:
+                    # Ed25519 signatures are always 64 bytes, RSA-2048 ones 256
+                    algorithm = 'Ed25519' if len(signature) == 64 else 'RSA-PSS'
+                
+                if algorithm == 'Ed25519':
+                    self.ed_public_key.verify(signature, data.encode('utf-8'))
+                    return True
+                
+                # Verify the RSA signature, kept for signatures made before Ed25519
+                self._verifier(
                     signature,
                     data.encode('utf-8'),
-                    padding.PSS(
-                        mgf=padding.MGF1(hashes.SHA256()),
-                        salt_length=padding.PSS.MAX_LENGTH
-                    ),
-                    hashes.SHA256()
+                    self._pss_verify,
+                    self._hash_algo
                 )
                 
                 # If no exception was raised, signature is valid
                 return True
             else:
                 # Fallback to HMAC verification
-                secret_key = current_app.config.get('SECRET_KEY', 'fallback-secret').encode('utf-8')
+                secret_key = self._get_hmac_key()
                 
-                expected_signature = hmac.new(
+                expected_signature = hmac.digest(
                     secret_key,
                     data.encode('utf-8'),
-                    hashlib.sha256
-                ).hexdigest()
+                    'sha256'
+                ).hex()
                 
-                return signature_b64 == expected_signature
+                # Constant-time comparison to avoid leaking timing information
+                return hmac.compare_digest(signature_b64, expected_signature)
         except Exception as e:
             print(f"Signature verification failed: {str(e)}")
             return False
@@ -218,37 +405,18 @@ class DigitalSignature:
         algorithm = self.tex_escape(signature_data.get('algorithm', 'Unknown'))
         signature = self.tex_escape(signature_data.get('signature', 'Invalid')[:16] + '...')
         
-        return f"""\\begin{{center}}
-\\framebox{{
-\\begin{{minipage}}{{0.8\\textwidth}}
-\\textbf{{Digital Signature}}\\\\
-Signed by: {username}\\\\
-Date and Time: {timestamp}\\\\
-Method: {algorithm}\\\\
-Signature: {signature}\\\\
-\\end{{minipage}}
-}}
-\\end{{center}}"""
+        return _LATEX_SIGNATURE_TEMPLATE.format(
+            username=username,
+            timestamp=timestamp,
+            algorithm=algorithm,
+            signature=signature
+        )
     
     @staticmethod
+    @functools.lru_cache(maxsize=256)
     def tex_escape(text):
-        """Escape special LaTeX characters"""
+        """Escape special LaTeX characters (memoised, the same names and algorithms recur)"""
         if text is None:
             return ""
         
-        conv = {
-            '&': r'\&',
-            '%': r'\%',
-            '$': r'\$',
-            '#': r'\#',
-            '_': r'\_',
-            '{': r'\{',
-            '}': r'\}',
-            '~': r'\textasciitilde{}',
-            '^': r'\^{}',
-            '\\': r'\textbackslash{}',
-            '<': r'\textless{}',
-            '>': r'\textgreater{}',
-        }
-        regex = re.compile('|'.join(re.escape(key) for key in sorted(conv.keys(), key=lambda item: -len(item))))
-        return regex.sub(lambda match: conv[match.group()], text)
+        return text.translate(_TEX_TABLE)
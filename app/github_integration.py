@@ -1,11 +1,97 @@
-from github import Github
+from github import Github, UnknownObjectException
 from flask import current_app
+from app.utils import copy_file_contents, generate_safe_filename, make_temp_dir, write_text_file, IO_WORKERS
 import os
-import base64
 import subprocess
 import tempfile
 import re
+import shlex
 import shutil
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib3.util.retry import Retry
+
+# Successful repository lookups, shared across requests for a short time so
+# repeated checks during and between publishes don't spend GitHub API rate
+# limit or gh CLI processes. Only hits are cached, so a newly created
+# repository is never hidden by a stale miss. Expired entries are dropped
+# when next looked up, and the least recently used one when the cache is full.
+REPO_CACHE_TTL = 60
+REPO_CACHE_SIZE = 256
+_repo_cache = OrderedDict()  # key -> (expiry time, value)
+_repo_cache_lock = threading.Lock()
+
+def _cache_get(key):
+    """Get a cached repository lookup if it hasn't expired"""
+    with _repo_cache_lock:
+        entry = _repo_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _repo_cache[key]
+            return None
+        _repo_cache.move_to_end(key)
+        return entry[1]
+
+def _cache_set(key, value):
+    """Cache a repository lookup for REPO_CACHE_TTL seconds"""
+    with _repo_cache_lock:
+        _repo_cache[key] = (time.monotonic() + REPO_CACHE_TTL, value)
+        _repo_cache.move_to_end(key)
+        if len(_repo_cache) > REPO_CACHE_SIZE:
+            _repo_cache.popitem(last=False)
+
+def _cache_pop(key):
+    """Forget a cached repository lookup"""
+    with _repo_cache_lock:
+        _repo_cache.pop(key, None)
+
+def clear_repository_cache():
+    """Forget all cached repository lookups"""
+    with _repo_cache_lock:
+        _repo_cache.clear()
+
+# Repository URL formats accepted by import_project_from_github
+_SSH_URL_RE = re.compile(r'git@github\.com:([^/]+)/([^.]+)\.git')
+_HTTPS_URL_RE = re.compile(r'github\.com/([^/]+)/([^/]+)')
+
+# PyGithub clients, one per token, shared across requests so their pooled
+# HTTPS connections to the API stay open between calls
+_github_clients = {}
+
+def _github_client(token):
+    """Return the shared PyGithub client for a token"""
+    client = _github_clients.get(token)
+    if client is None:
+        client = Github(
+            token,
+            pool_size=16,
+            retry=Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504))
+        )
+        _github_clients[token] = client
+    return client
+
+def _walk_files(directory):
+    """Yield (path, name) for every file under a directory, skipping .git
+    
+    scandir's entries carry the file type from the directory listing, so no
+    file needs a separate stat.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name != '.git':
+                    yield from _walk_files(entry.path)
+            elif entry.is_file():
+                yield entry.path, entry.name
+
+def _run_silent(cmd, **kwargs):
+    """Run a command whose output is never read, raising if it fails"""
+    if 'input' not in kwargs:
+        kwargs['stdin'] = subprocess.DEVNULL
+    return subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True, **kwargs)
 
 class GitHubIntegration:
     def __init__(self):
@@ -18,11 +104,39 @@ class GitHubIntegration:
         # Use username/token auth for API only (if available)
         self.token = current_app.config.get('GITHUB_TOKEN', '')
         if self.token:
-            self.github = Github(self.token)
+            self.github = _github_client(self.token)
             self.user = self.github.get_user()
         else:
             self.github = None
             self.user = None
+        
+        # Multiplex ssh/git invocations over one persistent SSH connection to
+        # GitHub, so only the first one pays for the handshake. The control
+        # socket lives on tmpfs when available. GitHub's host key is recorded
+        # the first time it is seen and checked on every later connection.
+        control_dir = current_app.config.get(
+            'GITHUB_SSH_CONTROL_DIR',
+            next((d for d in ('/run/shm', '/dev/shm') if os.path.isdir(d)), tempfile.gettempdir())
+        )
+        control_persist = current_app.config.get('GITHUB_SSH_CONTROL_PERSIST', 300)
+        self.ssh_options = [
+            '-o', 'ControlMaster=auto',
+            '-o', f"ControlPath={os.path.join(control_dir, 'eln-ssh-%r@%h:%p')}",
+            '-o', f'ControlPersist={control_persist}',
+            '-o', 'StrictHostKeyChecking=accept-new'
+        ]
+    
+    def _ssh_env(self):
+        """Environment for git commands that talk to GitHub over the shared SSH connection"""
+        return dict(os.environ, GIT_SSH_COMMAND=shlex.join(['ssh'] + self.ssh_options))
+    
+    def _get_repo(self, full_name):
+        """Get a repository through the API, reusing earlier lookups"""
+        repo = _cache_get(('repo', full_name))
+        if repo is None:
+            repo = self.github.get_repo(full_name)
+            _cache_set(('repo', full_name), repo)
+        return repo
     
     def verify_ssh_setup(self):
         """Verify that SSH keys are set up for GitHub authentication"""
@@ -36,7 +150,8 @@ class GitHubIntegration:
         # Test SSH connection to GitHub
         try:
             result = subprocess.run(
-                ['ssh', '-T', '-o', 'StrictHostKeyChecking=no', 'git@github.com'],
+                # Same options as git, so this also opens the shared connection
+                ['ssh', '-T'] + self.ssh_options + ['git@github.com'],
                 capture_output=True,
                 text=True
             )
@@ -110,16 +225,20 @@ class GitHubIntegration:
         """Check if a repository exists for the authenticated user"""
         if self.github and self.user:
             # Use PyGithub API if token is available
+            # Fetch the repository directly (one request) rather than paging
+            # through every repository the user owns
             try:
-                repos = self.user.get_repos()
-                for repo in repos:
-                    if repo.name == repo_name:
-                        return True
+                self._get_repo(f"{self.user.login}/{repo_name}")
+                return True
+            except UnknownObjectException:
                 return False
             except Exception:
                 return False
         else:
-            # Use GitHub CLI
+            # Use GitHub CLI, unless the details were looked up recently
+            if _cache_get(('details', f"{self.github_username}/{repo_name}")) is not None:
+                return True
+            
             try:
                 result = subprocess.run(
                     ['gh', 'repo', 'view', f"{self.github_username}/{repo_name}"],
@@ -131,7 +250,32 @@ class GitHubIntegration:
                 return False
     
     def get_repository_details(self, repo_name):
-        """Get repository details using GitHub CLI"""
+        """Get repository details"""
+        if self.github and self.user:
+            # Use PyGithub API if token is available; the repository object is
+            # cached, so this avoids starting the gh CLI entirely
+            try:
+                repo = self._get_repo(f"{self.user.login}/{repo_name}")
+                return {
+                    'success': True,
+                    'repo_name': repo.name,
+                    'full_name': repo.full_name,
+                    'description': repo.description or '',
+                    'html_url': repo.html_url,
+                    'ssh_url': repo.ssh_url
+                }
+            except Exception as e:
+                return {
+                    'success': False,
+                    'error': str(e)
+                }
+        
+        # Use GitHub CLI, unless the details were looked up recently
+        cache_key = ('details', f"{self.github_username}/{repo_name}")
+        details = _cache_get(cache_key)
+        if details is not None:
+            return details
+        
         try:
             result = subprocess.run(
                 ['gh', 'repo', 'view', f"{self.github_username}/{repo_name}", '--json', 'name,description,sshUrl,url'],
@@ -142,7 +286,7 @@ class GitHubIntegration:
             if result.returncode == 0:
                 import json
                 repo_data = json.loads(result.stdout)
-                return {
+                details = {
                     'success': True,
                     'repo_name': repo_data['name'],
                     'full_name': f"{self.github_username}/{repo_data['name']}",
@@ -150,6 +294,8 @@ class GitHubIntegration:
                     'html_url': repo_data['url'],
                     'ssh_url': repo_data['sshUrl']
                 }
+                _cache_set(cache_key, details)
+                return details
             else:
                 return {
                     'success': False,
@@ -167,8 +313,10 @@ class GitHubIntegration:
             # Use PyGithub API if token is available
             try:
                 full_name = f"{self.user.login}/{repo_name}"
-                repo = self.github.get_repo(full_name)
+                repo = self._get_repo(full_name)
                 repo.delete()
+                _cache_pop(('repo', full_name))
+                _cache_pop(('details', full_name))
                 return {'success': True}
             except Exception as e:
                 return {
@@ -185,6 +333,7 @@ class GitHubIntegration:
                 )
                 
                 if result.returncode == 0:
+                    _cache_pop(('details', f"{self.github_username}/{repo_name}"))
                     return {'success': True}
                 else:
                     return {
@@ -201,27 +350,16 @@ class GitHubIntegration:
         """Publish an entire project to GitHub using Git and SSH"""
         try:
             # Create a temporary directory
-            temp_dir = tempfile.mkdtemp()
+            temp_dir = make_temp_dir()
             
             try:
-                # Initialize git repo in temp directory
-                subprocess.run(['git', 'init'], cwd=temp_dir, check=True, capture_output=True)
-                
-                # Configure git user (use ELN as author if not specified in config)
-                git_user_name = current_app.config.get('GIT_USER_NAME', 'Electronic Lab Notebook')
-                git_user_email = current_app.config.get('GIT_USER_EMAIL', 'eln@example.com')
-                
-                subprocess.run(['git', 'config', 'user.name', git_user_name], cwd=temp_dir, check=True, capture_output=True)
-                subprocess.run(['git', 'config', 'user.email', git_user_email], cwd=temp_dir, check=True, capture_output=True)
-                
                 # Create or get repository
+                # Ask for the repository details directly; a failed lookup means
+                # it does not exist yet, which saves a separate existence check
                 repo_name = f"eln-{project.name.lower().replace(' ', '-')}"
-                repo_exists = self.check_repository_exists(repo_name)
+                repo_details = self.get_repository_details(repo_name)
                 
-                if repo_exists:
-                    repo_details = self.get_repository_details(repo_name)
-                    if not repo_details['success']:
-                        return repo_details
+                if repo_details['success']:
                     ssh_url = repo_details['ssh_url']
                     full_name = repo_details['full_name']
                     html_url = repo_details['html_url']
@@ -233,54 +371,83 @@ class GitHubIntegration:
                     full_name = result['full_name']
                     html_url = result['html_url']
                 
-                # Add remote
-                subprocess.run(['git', 'remote', 'add', 'origin', ssh_url], cwd=temp_dir, check=True, capture_output=True)
+                # Configure git user (use ELN as author if not specified in config).
+                # The identity is passed to commit-tree in its environment, so
+                # the scratch repository needs no config commands
+                git_user_name = current_app.config.get('GIT_USER_NAME', 'Electronic Lab Notebook')
+                git_user_email = current_app.config.get('GIT_USER_EMAIL', 'eln@example.com')
+                git_identity = dict(
+                    os.environ,
+                    GIT_AUTHOR_NAME=git_user_name, GIT_AUTHOR_EMAIL=git_user_email,
+                    GIT_COMMITTER_NAME=git_user_name, GIT_COMMITTER_EMAIL=git_user_email
+                )
+                
+                # Initialize git repo on a main branch
+                _run_silent(['git', 'init', '-q', '-b', 'main'], cwd=temp_dir)
                 
                 # Create README.md with project info
                 readme_content = f"# {project.name}\n\n{project.description}\n\n"
                 readme_content += f"This is an Electronic Laboratory Notebook project.\n"
                 
-                with open(os.path.join(temp_dir, 'README.md'), 'w') as f:
-                    f.write(readme_content)
+                # Write the README and text files to scratch files, and hash
+                # everything into git's object store in one pass. Binary files
+                # are hashed straight from the upload folder, so they are never
+                # copied into the staging directory
+                readme_path = os.path.join(temp_dir, 'README.md')
+                write_text_file(readme_path, readme_content)
+                sources = [readme_path]
+                paths = ['README.md']
                 
-                # Add and commit files
-                for file in files:
-                    file_path = os.path.join(temp_dir, file.filename)
-                    
+                for i, file in enumerate(files):
                     if file.file_type == 'text':
-                        # Write text file
-                        with open(file_path, 'w') as f:
-                            f.write(file.content or '')
+                        # Write text file straight to the fd, skipping the
+                        # buffered text layer and newline translation
+                        source = os.path.join(temp_dir, f"{i}.txt")
+                        write_text_file(source, file.content or '')
                     else:
-                        # Copy binary file
-                        shutil.copy2(file.file_path, file_path)
+                        source = file.file_path
+                    sources.append(source)
+                    paths.append(file.filename)
                 
-                # Add all files to git
-                subprocess.run(['git', 'add', '.'], cwd=temp_dir, check=True, capture_output=True)
+                hashed = subprocess.run(
+                    ['git', 'hash-object', '-w', '--stdin-paths'],
+                    cwd=temp_dir, check=True, capture_output=True, text=True,
+                    input='\n'.join(sources)
+                )
+                index_info = ''.join(
+                    f"100644 blob {blob}\t{path}\0" for blob, path in zip(hashed.stdout.split(), paths)
+                )
                 
-                # Commit changes
-                subprocess.run(
-                    ['git', 'commit', '-m', f"Publish project: {project.name}"],
-                    cwd=temp_dir, check=True, capture_output=True
+                # Stage the blobs under their project paths and commit them with
+                # git's plumbing, rather than having 'git add .' scan a work tree
+                # and 'git commit' reread the index
+                _run_silent(
+                    ['git', 'update-index', '-z', '--index-info'],
+                    cwd=temp_dir, input=index_info.encode('utf-8')
                 )
+                tree = subprocess.run(
+                    ['git', 'write-tree'],
+                    cwd=temp_dir, stdin=subprocess.DEVNULL, check=True, capture_output=True, text=True
+                ).stdout.strip()
+                commit = subprocess.run(
+                    ['git', 'commit-tree', tree, '-m', f"Publish project: {project.name}"],
+                    cwd=temp_dir, stdin=subprocess.DEVNULL, check=True, capture_output=True, text=True,
+                    env=git_identity
+                ).stdout.strip()
+                _run_silent(['git', 'update-ref', 'refs/heads/main', commit], cwd=temp_dir)
                 
-                # Push to GitHub using SSH
+                # Push the single publish commit to GitHub using SSH, straight
+                # to the repository URL as nothing reads a remote afterwards
                 push_result = subprocess.run(
-                    ['git', 'push', '-u', 'origin', 'main'],
-                    cwd=temp_dir, capture_output=True, text=True
+                    ['git', 'push', ssh_url, 'main'],
+                    cwd=temp_dir, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE, env=self._ssh_env()
                 )
                 
-                if push_result.returncode != 0:
-                    # Try pushing to master branch if main fails
-                    push_result = subprocess.run(
-                        ['git', 'push', '-u', 'origin', 'master'],
-                        cwd=temp_dir, capture_output=True, text=True
-                    )
-                
                 if push_result.returncode != 0:
                     return {
                         'success': False,
-                        'error': f"Failed to push to GitHub: {push_result.stderr}"
+                        'error': f"Failed to push to GitHub: {push_result.stderr.decode('utf-8', 'replace')}"
                     }
                 
                 return {
@@ -301,6 +468,48 @@ class GitHubIntegration:
                 'error': str(e)
             }
     
+    def _ingest_repo_file(self, file_path, dest_path, repo_dir):
+        """Classify a cloned file and copy it to its path in the upload folder
+        
+        Runs on worker threads, so it only touches the filesystem and returns
+        the fields for the File record instead of creating it.
+        """
+        # Get relative path from repo root
+        rel_path = os.path.relpath(file_path, repo_dir)
+        
+        # Determine file type
+        file_type = 'binary'
+        content = None
+        
+        # Text files never contain NUL bytes, so peek at the start of the file
+        # before reading and decoding the whole of it
+        with open(file_path, 'rb') as f:
+            head = f.read(8192)
+            if b'\0' not in head:
+                try:
+                    content = (head + f.read()).decode('utf-8')
+                    if '\r' in content:
+                        # Match text-mode reading's newline handling
+                        content = content.replace('\r\n', '\n').replace('\r', '\n')
+                    file_type = 'text'
+                except UnicodeDecodeError:
+                    pass
+        
+        if file_type != 'text':
+            # Not a text file, check if it's an image
+            if rel_path.lower().endswith(('.jpg', '.jpeg', '.png', '.gif')):
+                file_type = 'image'
+        
+        # Copy to upload folder; the clone's file times aren't meaningful
+        copy_file_contents(file_path, dest_path)
+        
+        return {
+            'filename': rel_path,
+            'file_path': dest_path,
+            'file_type': file_type,
+            'content': content
+        }
+    
     def import_project_from_github(self, repo_name_or_url, user_id):
         """Import a project from GitHub using Git and SSH"""
         from app.models import Project, File
@@ -310,7 +519,7 @@ class GitHubIntegration:
         if '/' in repo_name_or_url:
             # Handle SSH URL: git@github.com:username/repo.git
             if repo_name_or_url.startswith('git@github.com:'):
-                match = re.search(r'git@github\.com:([^/]+)/([^.]+)\.git', repo_name_or_url)
+                match = _SSH_URL_RE.search(repo_name_or_url)
                 if match:
                     username, repo_name = match.groups()
                 else:
@@ -320,7 +529,7 @@ class GitHubIntegration:
                     }
             # Handle HTTPS URL: https://github.com/username/repo
             elif 'github.com' in repo_name_or_url:
-                match = re.search(r'github\.com/([^/]+)/([^/]+)', repo_name_or_url)
+                match = _HTTPS_URL_RE.search(repo_name_or_url)
                 if match:
                     username, repo_name = match.groups()
                 else:
@@ -350,20 +559,23 @@ class GitHubIntegration:
         
         try:
             # Create a temporary directory
-            temp_dir = tempfile.mkdtemp()
+            temp_dir = make_temp_dir()
             
             try:
-                # Clone the repository
+                # Clone only the tip of the default branch; history is never
+                # read, and LFS objects are left as pointer files
                 clone_result = subprocess.run(
-                    ['git', 'clone', ssh_url, temp_dir],
-                    capture_output=True,
-                    text=True
+                    ['git', 'clone', '--depth=1', '--single-branch', '--no-tags', ssh_url, temp_dir],
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    env=dict(self._ssh_env(), GIT_LFS_SKIP_SMUDGE='1')
                 )
                 
                 if clone_result.returncode != 0:
                     return {
                         'success': False,
-                        'error': f"Failed to clone repository: {clone_result.stderr}"
+                        'error': f"Failed to clone repository: {clone_result.stderr.decode('utf-8', 'replace')}"
                     }
                 
                 # Create project
@@ -377,55 +589,36 @@ class GitHubIntegration:
                 db.session.add(project)
                 db.session.flush()  # Get project ID without committing
                 
-                # Process all files in the repo
-                all_files = []
+                # Save files in our storage
+                upload_folder = current_app.config['UPLOAD_FOLDER']
                 
-                for root, _, filenames in os.walk(temp_dir):
-                    # Skip .git directory
-                    if '.git' in root:
-                        continue
-                    
-                    for filename in filenames:
-                        file_path = os.path.join(root, filename)
-                        
-                        # Get relative path from repo root
-                        rel_path = os.path.relpath(file_path, temp_dir)
-                        
-                        # Determine file type
-                        file_type = 'binary'
-                        content = None
-                        
-                        # Try to read as text
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                file_type = 'text'
-                        except UnicodeDecodeError:
-                            # Not a text file, check if it's an image
-                            if rel_path.lower().endswith(('.jpg', '.jpeg', '.png', '.gif')):
-                                file_type = 'image'
-                        
-                        # Save file in our storage
-                        upload_folder = current_app.config['UPLOAD_FOLDER']
-                        dest_path = os.path.join(upload_folder, filename)
-                        
-                        # Copy to upload folder
-                        shutil.copy2(file_path, dest_path)
-                        
-                        # Create file record
-                        file = File(
-                            filename=rel_path,
-                            file_path=dest_path,
-                            file_type=file_type,
-                            content=content,
-                            project_id=project.id
-                        )
-                        
-                        db.session.add(file)
-                        all_files.append(file)
+                # Collect all files in the repo. Files in different directories
+                # can share a name (README.md, __init__.py), so give each one a
+                # unique name in the upload folder before the copies start
+                repo_files = [
+                    (file_path, os.path.join(upload_folder, generate_safe_filename(filename)))
+                    for file_path, filename in _walk_files(temp_dir)
+                ]
+                
+                # Reading and copying is I/O bound, so overlap it across threads
+                with ThreadPoolExecutor(max_workers=IO_WORKERS) as executor:
+                    ingested = list(executor.map(
+                        lambda repo_file: self._ingest_repo_file(repo_file[0], repo_file[1], temp_dir),
+                        repo_files
+                    ))
+                
+                # The database session is not thread-safe, so create the
+                # file records here, with one executemany insert rather than
+                # an ORM object per file
+                if ingested:
+                    for file_fields in ingested:
+                        file_fields['project_id'] = project.id
+                    db.session.execute(File.__table__.insert(), ingested)
                 
                 db.session.commit()
                 
+                all_files = File.query.filter_by(project_id=project.id).all()
+                
                 return {
                     'success': True,
                     'project': project,
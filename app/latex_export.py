@@ -1,20 +1,94 @@
 import os
 import re
-import tempfile
 import shutil
 import subprocess
 import io
 from datetime import datetime
 import sys
 import json
-from flask import current_app, session
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context, session
+from app.utils import IO_WORKERS, copy_file_contents, make_temp_dir, write_text_file
+
+logger = logging.getLogger(__name__)
+
+# Characters not allowed in file names inside the build directory
+_SAFE_NAME_RE = re.compile(r'[^a-zA-Z0-9_.-]')
+
+# RTF markup stripped by extract_text_from_rtf; braces and paragraph marks
+# are plain strings and don't need a pattern
+_RTF_CONTROL_WORD_RE = re.compile(r'\\[a-z0-9]+')
+_RTF_HEX_ESCAPE_RE = re.compile(r'\\\'[0-9a-f]{2}')
+_RTF_CONTROL_SEQUENCE_RE = re.compile(r'\\\*.*?;')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# RTF header, after any leading whitespace
+_RTF_HEADER_RE = re.compile(r'\s*\{\\rtf')
+
+# ${name}$ placeholders in LatexExport.template
+_PLACEHOLDER_RE = re.compile(r'\$\{(\w+)\}\$')
+
+# Signature markers embedded in notebook text
+_SIGNATURE_RE = re.compile(r'\[Signed: (.*?) at (.*?)\]')
+
+# Replacements for LaTeX special characters other than the backslash, in the
+# order tex_escape applies them: braces go first so that the braces added by
+# the later replacements are not escaped again
+_TEX_REPLACEMENTS = (
+    ('{', r'\{'),
+    ('}', r'\}'),
+    ('&', r'\&'),
+    ('%', r'\%'),
+    ('$', r'\$'),
+    ('#', r'\#'),
+    ('_', r'\_'),
+    ('~', r'\textasciitilde{}'),
+    ('^', r'\^{}'),
+    ('<', r'\textless{}'),
+    ('>', r'\textgreater{}'),
+)
+
+# The same replacements as a single-pass table, for text tex_escape's
+# backslash placeholder can't be used on
+_TEX_TABLE = str.maketrans({
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\^{}',
+    '\\': r'\textbackslash{}',
+    '<': r'\textless{}',
+    '>': r'\textgreater{}',
+})
+
+# Commands that build output.pdf from output.tex in the build directory, each
+# with its timeout in seconds, run in order until one fails. pdflatex needs a
+# second pass to fill in the table of contents; the first only collects it, so
+# it runs in draft mode and writes no PDF. latexmk and tectonic decide
+# themselves how many passes are needed. batchmode keeps TeX quiet on the
+# terminal; everything it would print still goes to output.log
+_LATEX_ENGINES = {
+    'pdflatex': [
+        (['pdflatex', '-interaction=batchmode', '-halt-on-error', '-no-shell-escape', '-draftmode'], 60),
+        (['pdflatex', '-interaction=batchmode', '-halt-on-error', '-no-shell-escape'], 60),
+    ],
+    'latexmk': [
+        (['latexmk', '-pdf', '-interaction=batchmode', '-halt-on-error', '-no-shell-escape'], 120),
+    ],
+    'tectonic': [
+        (['tectonic', '-X', 'compile', '--keep-logs'], 120),
+    ],
+}
 
 class LatexExport:
-    def __init__(self):
-        """Initialize LaTeX export functionality"""
-        print("Initializing LatexExport")
-        # Base template with placeholders
-        self.template = r"""\documentclass[12pt]{article}
+    # Base template with placeholders, shared by every export
+    template = r"""\documentclass[12pt]{article}
 \usepackage[a4paper, margin=1in]{geometry}
 \usepackage{graphicx}
 \usepackage{float}
@@ -61,13 +135,29 @@ ${imported_pdfs}$
 ${signatures}$
 
 \end{document}"""
+    # The template split at its placeholders: literal text at even indices,
+    # placeholder names at odd ones
+    _template_parts = _PLACEHOLDER_RE.split(template)
+    
+    def __init__(self, engine=None):
+        """Initialize LaTeX export functionality
+        
+        engine is 'pdflatex', 'latexmk' or 'tectonic'; it defaults to the
+        LATEX_ENGINE setting, or pdflatex.
+        """
+        if has_app_context() and engine is None:
+            engine = current_app.config.get('LATEX_ENGINE', 'pdflatex')
+        self.engine = engine or 'pdflatex'
+        if self.engine not in _LATEX_ENGINES:
+            raise ValueError(f"Unknown LaTeX engine: {self.engine}")
+        logger.debug("Initializing LatexExport with %s", self.engine)
         
         # Try to initialize the digital signature module
         try:
-            from .digital_signature import DigitalSignature
-            self.signature_manager = DigitalSignature()
+            from .digital_signature import get_digital_signature
+            self.signature_manager = get_digital_signature()
         except ImportError:
-            print("Digital signature module not available")
+            logger.warning("Digital signature module not available")
             self.signature_manager = None
     
     @staticmethod
@@ -75,42 +165,39 @@ ${signatures}$
         """Escape special LaTeX characters"""
         if text is None:
             return ""
+        if '\0' in text:
+            return text.translate(_TEX_TABLE)
         
-        conv = {
-            '&': r'\&',
-            '%': r'\%',
-            '$': r'\$',
-            '#': r'\#',
-            '_': r'\_',
-            '{': r'\{',
-            '}': r'\}',
-            '~': r'\textasciitilde{}',
-            '^': r'\^{}',
-            '\\': r'\textbackslash{}',
-            '<': r'\textless{}',
-            '>': r'\textgreater{}',
-        }
-        regex = re.compile('|'.join(re.escape(key) for key in sorted(conv.keys(), key=lambda item: -len(item))))
-        return regex.sub(lambda match: conv[match.group()], text)
+        # One str.replace per special character beats translate's
+        # per-character mapping lookups by an order of magnitude, because
+        # CPython finds the characters with memchr. Backslashes are parked on
+        # NUL meanwhile so the ones the replacements add are left alone
+        text = text.replace('\\', '\0')
+        for char, replacement in _TEX_REPLACEMENTS:
+            text = text.replace(char, replacement)
+        return text.replace('\0', r'\textbackslash{}')
     
     def is_rtf_content(self, content):
         """Determine if content is in RTF format"""
-        return content and content.strip().startswith(r'{\rtf')
+        # Match at the start rather than strip(), which copies the whole content
+        return bool(content) and _RTF_HEADER_RE.match(content) is not None
 
     def extract_text_from_rtf(self, rtf_content):
         """Extract plain text from RTF content using regex patterns"""
         if not rtf_content:
             return ""
         
-        # Remove RTF control sequences
-        text = re.sub(r'\\[a-z0-9]+', ' ', rtf_content)  # Remove control words
-        text = re.sub(r'\{|\}', '', text)  # Remove braces
-        text = re.sub(r'\\\'[0-9a-f]{2}', '', text)  # Remove hex escapes
-        text = re.sub(r'\\\*.*?;', '', text)  # Remove other control sequences
-        text = re.sub(r'\\par', '\n', text)  # Replace paragraph marks with newlines
+        # Remove RTF control sequences. A combined pattern with a replacement
+        # callback is slower than these passes, which str.replace and the
+        # regex engine each make in C
+        text = _RTF_CONTROL_WORD_RE.sub(' ', rtf_content)  # Remove control words
+        text = text.replace('{', '').replace('}', '')  # Remove braces
+        text = _RTF_HEX_ESCAPE_RE.sub('', text)  # Remove hex escapes
+        text = _RTF_CONTROL_SEQUENCE_RE.sub('', text)  # Remove other control sequences
+        text = text.replace('\\par', '\n')  # Replace paragraph marks with newlines
         
         # Clean up whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         return text.strip()
     
@@ -121,7 +208,7 @@ ${signatures}$
             
         # Check if content is RTF
         if self.is_rtf_content(content):
-            print("RTF content detected, extracting plain text")
+            logger.debug("RTF content detected, extracting plain text")
             return self.extract_text_from_rtf(content)
         
         return content
@@ -131,8 +218,7 @@ ${signatures}$
         signatures = []
         
         # Simple pattern matching for signatures
-        signature_pattern = r'\[Signed: (.*?) at (.*?)\]'
-        matches = re.findall(signature_pattern, content)
+        matches = _SIGNATURE_RE.findall(content)
         
         for match in matches:
             username, timestamp = match
@@ -144,34 +230,79 @@ ${signatures}$
         
         return signatures
     
+    @staticmethod
+    def _link_or_copy(src, dst):
+        """Symlink a file into the build directory, copying it if links aren't supported
+        
+        pdflatex reads through the link, and the build directory is removed
+        before the source could go away.
+        """
+        # Fail like a copy would if the source is missing, rather than
+        # leaving a dangling link for pdflatex to trip over
+        os.stat(src)
+        try:
+            os.symlink(os.path.abspath(src), dst)
+        except OSError:
+            copy_file_contents(src, dst)
+    
+    def _start_copy(self, executor, file, target_dir):
+        """Start copying a file into the build directory, returning its safe name and future"""
+        safe_name = _SAFE_NAME_RE.sub('_', file.filename)
+        future = executor.submit(self._link_or_copy, file.file_path, os.path.join(target_dir, safe_name))
+        return safe_name, future
+    
     def generate_latex(self, project, files):
         """Generate LaTeX code for a project"""
-        print("Generating LaTeX content")
+        logger.debug("Generating LaTeX content")
         
         # Create temporary directory for files
-        temp_dir = tempfile.mkdtemp()
+        temp_dir = make_temp_dir()
         image_dir = os.path.join(temp_dir, 'images')
         pdf_dir = os.path.join(temp_dir, 'pdfs')
         os.makedirs(image_dir, exist_ok=True)
         os.makedirs(pdf_dir, exist_ok=True)
         
-        # Sort files by date (newest first)
+        # Sort files by date (newest first). The export route already fetches
+        # them in this order, which makes the sort a single linear pass.
+        # Undated files go first, as if just updated
         try:
-            sorted_files = sorted(files, key=lambda f: f.updated_at if hasattr(f, 'updated_at') else datetime.now(), reverse=True)
-            print(f"Sorted {len(sorted_files)} files by date")
+            sorted_files = sorted(files, key=lambda f: getattr(f, 'updated_at', None) or datetime.max, reverse=True)
+            logger.debug("Sorted %d files by date", len(sorted_files))
         except Exception as e:
-            print(f"Error sorting files: {e}")
+            logger.error("Error sorting files: %s", e)
             sorted_files = files
         
-        # Collect signatures for verification section
-        all_signatures = []
+        # File names, users and timestamps recur across sections and
+        # signatures, so escape each one once per export. File contents are
+        # escaped directly, as hashing them would cost as much as escaping
+        escape_name = functools.lru_cache(maxsize=4096)(self.tex_escape)
         
-        # Prepare sections for text files
-        sections_text = ""
+        # Sort the files into the document's sections in one pass
+        text_files = []
+        image_files = []
+        pdf_files = []
         for file in sorted_files:
             if file.file_type == 'text':
-                print(f"Adding text file: {file.filename}")
-                section_title = self.tex_escape(file.filename)
+                text_files.append(file)
+            elif file.file_type == 'image':
+                image_files.append(file)
+            elif file.file_type == 'binary' and file.filename.lower().endswith('.pdf'):
+                pdf_files.append(file)
+        
+        # Start copying images and PDFs into the build directory now so the
+        # copies run while the text sections are being built
+        with ThreadPoolExecutor(max_workers=IO_WORKERS) as executor:
+            image_copies = [self._start_copy(executor, file, image_dir) for file in image_files]
+            pdf_copies = [self._start_copy(executor, file, pdf_dir) for file in pdf_files]
+            
+            # Collect signatures for verification section
+            all_signatures = []
+            
+            # Prepare sections for text files
+            sections_parts = []
+            for file in text_files:
+                logger.debug("Adding text file: %s", file.filename)
+                section_title = escape_name(file.filename)
                 
                 # Process content (handle RTF if needed)
                 content = file.content
@@ -194,65 +325,60 @@ ${signatures}$
                     except:
                         updated_date = "Date unknown"
                 
-                sections_text += f"""\\section{{{section_title}}}
+                sections_parts.append(f"""\\section{{{section_title}}}
 \\textit{{{updated_date}}}
 
 {section_content}
 
 \\newpage
-"""
-        
-        # Prepare images
-        images_text = ""
-        if any(file.file_type == 'image' for file in sorted_files):
-            images_text = "\\section{Figures}\n"
+""")
             
-            for file in sorted_files:
-                if file.file_type == 'image':
-                    print(f"Processing image file: {file.filename}")
-                    safe_name = re.sub(r'[^a-zA-Z0-9_.-]', '_', file.filename)
-                    temp_image_path = os.path.join(image_dir, safe_name)
+            # Prepare images
+            images_parts = []
+            for file, (safe_name, copy) in zip(image_files, image_copies):
+                logger.debug("Processing image file: %s", file.filename)
+                
+                try:
+                    copy.result()
+                    image_path = f"images/{safe_name}"
+                    caption = escape_name(file.filename)
                     
-                    try:
-                        shutil.copy2(file.file_path, temp_image_path)
-                        image_path = f"images/{safe_name}"
-                        caption = self.tex_escape(file.filename)
-                        
-                        images_text += f"""
+                    images_parts.append(f"""
 \\begin{{figure}}[H]
     \\centering
     \\includegraphics[width=0.8\\textwidth]{{{image_path}}}
     \\caption{{{caption}}}
 \\end{{figure}}
 \\newpage
-"""
-                    except Exception as e:
-                        print(f"Error copying image {file.file_path}: {str(e)}")
-        
-        # Handle PDF files
-        imported_pdfs_text = ""
-        pdf_files = [f for f in sorted_files if f.file_type == 'binary' and f.filename.lower().endswith('.pdf')]
-        
-        if pdf_files:
-            imported_pdfs_text = "\\section{Imported PDF Documents}\n"
+""")
+                except Exception as e:
+                    logger.error("Error copying image %s: %s", file.file_path, e)
             
-            for i, file in enumerate(pdf_files):
-                print(f"Processing PDF file: {file.filename}")
-                safe_name = re.sub(r'[^a-zA-Z0-9_.-]', '_', file.filename)
-                temp_pdf_path = os.path.join(pdf_dir, safe_name)
+            # Leave the section out entirely if no figure could be staged
+            if images_parts:
+                images_parts.insert(0, "\\section{Figures}\n")
+            
+            # Handle PDF files
+            imported_pdfs_parts = []
+            
+            for i, (file, (safe_name, copy)) in enumerate(zip(pdf_files, pdf_copies)):
+                logger.debug("Processing PDF file: %s", file.filename)
                 
                 try:
-                    shutil.copy2(file.file_path, temp_pdf_path)
+                    copy.result()
                     pdf_path = f"pdfs/{safe_name}"
-                    title = self.tex_escape(file.filename)
+                    title = escape_name(file.filename)
                     
-                    imported_pdfs_text += f"""
+                    imported_pdfs_parts.append(f"""
 \\subsection{{{title}}}
 \\includepdf[pages=-, addtotoc={{1, section, 1, {title}, pdf:{i}}}, pagecommand={{}}]{{{pdf_path}}}
 \\newpage
-"""
+""")
                 except Exception as e:
-                    print(f"Error copying PDF {file.file_path}: {str(e)}")
+                    logger.error("Error copying PDF %s: %s", file.file_path, e)
+            
+            if imported_pdfs_parts:
+                imported_pdfs_parts.insert(0, "\\section{Imported PDF Documents}\n")
         
         # Abstract section
         abstract_text = f"""\\section{{Project Description}}
@@ -261,17 +387,17 @@ ${signatures}$
 """
 
         # Digital signatures section
-        signatures_text = ""
+        signatures_parts = []
         if all_signatures:
-            signatures_text = "\\section{Digital Signatures}\n"
-            signatures_text += "This document contains the following digital signatures:\n\n"
+            signatures_parts.append("\\section{Digital Signatures}\n")
+            signatures_parts.append("This document contains the following digital signatures:\n\n")
             
             for i, sig in enumerate(all_signatures):
-                username = self.tex_escape(sig.get('username', 'Unknown'))
-                timestamp = self.tex_escape(sig.get('timestamp', 'Unknown'))
-                filename = self.tex_escape(sig.get('filename', 'Unknown file'))
+                username = escape_name(sig.get('username', 'Unknown'))
+                timestamp = escape_name(sig.get('timestamp', 'Unknown'))
+                filename = escape_name(sig.get('filename', 'Unknown file'))
                 
-                signatures_text += f"""
+                signatures_parts.append(f"""
 \\begin{{colorbox}}{{signaturecolor}}{{
 \\begin{{minipage}}{{0.95\\textwidth}}
 \\textbf{{Signature {i+1}:}}\\\\
@@ -281,7 +407,7 @@ File: {filename}\\\\
 \\end{{minipage}}
 }}
 \\vspace{{0.5cm}}
-"""
+""")
             
             # Add a final document signature if signature manager is available
             if self.signature_manager:
@@ -295,7 +421,7 @@ File: {filename}\\\\
                         'file_count': len(sorted_files)
                     }
                     
-                    signatures_text += f"""
+                    signatures_parts.append(f"""
 \\begin{{colorbox}}{{signaturecolor}}{{
 \\begin{{minipage}}{{0.95\\textwidth}}
 \\textbf{{Document Verification Signature:}}\\\\
@@ -304,110 +430,127 @@ Generated at: {timestamp}\\\\
 Document contains {len(sorted_files)} files and {len(all_signatures)} embedded signatures\\\\
 \\end{{minipage}}
 }}
-"""
+""")
                 except Exception as e:
-                    print(f"Error creating document signature: {str(e)}")
+                    logger.error("Error creating document signature: %s", e)
         
         # Replace placeholders with content
-        latex_content = self.template
-        latex_content = latex_content.replace("${title}$", self.tex_escape(project.name))
-        latex_content = latex_content.replace("${abstract}$", abstract_text)
-        latex_content = latex_content.replace("${sections}$", sections_text)
-        latex_content = latex_content.replace("${images}$", images_text)
-        latex_content = latex_content.replace("${imported_pdfs}$", imported_pdfs_text)
-        latex_content = latex_content.replace("${signatures}$", signatures_text)
+        placeholders = {
+            'title': self.tex_escape(project.name),
+            'abstract': abstract_text,
+            'sections': "".join(sections_parts),
+            'images': "".join(images_parts),
+            'imported_pdfs': "".join(imported_pdfs_parts),
+            'signatures': "".join(signatures_parts),
+        }
+        latex_content = "".join(
+            placeholders[part] if i % 2 else part
+            for i, part in enumerate(self._template_parts)
+        )
         
-        print(f"LaTeX content generated, {len(latex_content)} characters")
+        logger.debug("LaTeX content generated, %d characters", len(latex_content))
         return latex_content, temp_dir
     
-    def generate_pdf(self, latex_content, temp_dir):
-        """Generate a PDF from LaTeX content"""
+    @staticmethod
+    def _read_log_tail(temp_dir, size=2000):
+        """Return the end of the TeX log, where the error that stopped it is reported"""
+        try:
+            with open(os.path.join(temp_dir, 'output.log'), 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - size))
+                return f.read().decode('utf-8', errors='replace')
+        except OSError:
+            return ""
+    
+    def generate_pdf(self, latex_content, temp_dir, output_path=None):
+        """Generate a PDF from LaTeX content
+        
+        With output_path, the PDF is moved there instead of being read into
+        memory, and the result holds 'pdf_path' rather than 'pdf_content'.
+        """
         try:
             # Write the LaTeX content to a file
             tex_file = os.path.join(temp_dir, 'output.tex')
-            print(f"Writing LaTeX to {tex_file}")
-            with open(tex_file, 'w', encoding='utf-8') as f:
-                f.write(latex_content)
+            logger.debug("Writing LaTeX to %s", tex_file)
+            write_text_file(tex_file, latex_content)
             
             # Compile LaTeX to PDF
-            for i in range(2):
-                print(f"Running pdflatex, attempt {i+1}")
+            for i, (command, timeout) in enumerate(_LATEX_ENGINES[self.engine]):
+                logger.debug("Running %s, attempt %d", self.engine, i + 1)
                 try:
                     process = subprocess.run(
-                        ['pdflatex', '-interaction=nonstopmode', tex_file],
+                        command + [tex_file],
                         cwd=temp_dir,
-                        stdout=subprocess.PIPE,
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.DEVNULL,
                         stderr=subprocess.PIPE,
-                        timeout=60  # Increased timeout for handling large PDFs
+                        timeout=timeout
                     )
-                    print(f"Return code: {process.returncode}")
+                    logger.debug("Return code: %d", process.returncode)
                     
                     if process.returncode != 0:
-                        output = process.stdout.decode('utf-8', errors='replace')
                         error = process.stderr.decode('utf-8', errors='replace')
-                        print(f"pdflatex output: {output[:200]}...")
-                        print(f"pdflatex error: {error[:200]}...")
+                        logger.error("%s log: ...%s", self.engine, self._read_log_tail(temp_dir))
+                        logger.error("%s error: %s...", self.engine, error[:200])
                 except subprocess.TimeoutExpired:
-                    print("pdflatex process timed out")
+                    logger.error("%s process timed out", self.engine)
                     return {'success': False, 'error': 'PDF generation timed out'}
+                
+                if process.returncode != 0:
+                    # TeX stopped at the first error; another pass won't fix it
+                    break
             
             if process.returncode != 0:
-                print("PDF generation failed")
+                logger.error("PDF generation failed")
                 return {'success': False, 'error': 'PDF generation failed'}
             
             # Check if PDF was created
             pdf_file = os.path.join(temp_dir, 'output.pdf')
-            print(f"Looking for PDF at: {pdf_file}")
+            logger.debug("Looking for PDF at: %s", pdf_file)
             
             if not os.path.exists(pdf_file):
-                print(f"PDF file not found, directory contents: {os.listdir(temp_dir)}")
+                logger.error("PDF file not found, directory contents: %s", os.listdir(temp_dir))
                 return {'success': False, 'error': 'PDF file was not created'}
             
+            if output_path:
+                # A rename when both are on the same filesystem, otherwise a
+                # copy that never passes through Python
+                logger.debug("Moving PDF to %s", output_path)
+                shutil.move(pdf_file, output_path)
+                return {'success': True, 'pdf_path': output_path}
+            
             # Read the PDF content
-            print("Reading PDF content")
+            logger.debug("Reading PDF content")
             with open(pdf_file, 'rb') as f:
                 pdf_content = f.read()
             
-            print(f"PDF content read, {len(pdf_content)} bytes")
+            logger.debug("PDF content read, %d bytes", len(pdf_content))
             return {'success': True, 'pdf_content': pdf_content}
             
         except Exception as e:
-            import traceback
-            print(f"Error generating PDF: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception("Error generating PDF: %s", e)
             return {'success': False, 'error': str(e)}
     
     def export_project_to_pdf(self, project, files, output_path=None):
         """Export a project to PDF"""
-        print(f"Exporting project '{project.name}' to PDF")
+        logger.debug("Exporting project '%s' to PDF", project.name)
         temp_dir = None
         try:
             # Generate LaTeX content
             latex_content, temp_dir = self.generate_latex(project, files)
             
             # Generate PDF
-            result = self.generate_pdf(latex_content, temp_dir)
-            
-            # Handle output path if specified
-            if output_path and result.get('success', False) and 'pdf_content' in result:
-                print(f"Writing PDF to {output_path}")
-                with open(output_path, 'wb') as f:
-                    f.write(result['pdf_content'])
-                result['pdf_path'] = output_path
-            
-            return result
+            return self.generate_pdf(latex_content, temp_dir, output_path)
             
         except Exception as e:
-            import traceback
-            print(f"Error in export_project_to_pdf: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception("Error in export_project_to_pdf: %s", e)
             return {'success': False, 'error': str(e)}
             
         finally:
             # Always clean up the temporary directory
             if temp_dir and os.path.exists(temp_dir):
                 try:
-                    print(f"Cleaning up temp directory: {temp_dir}")
+                    logger.debug("Cleaning up temp directory: %s", temp_dir)
                     shutil.rmtree(temp_dir)
                 except Exception as e:
-                    print(f"Error cleaning up temp directory: {str(e)}")
+                    logger.error("Error cleaning up temp directory: %s", e)
@@ -16,36 +16,26 @@ def add_rtf_columns(db_path):
         return False
     
     try:
-        # Connect to the database
-        conn = sqlite3.connect(db_path)
+        # Connect to the database. Python's sqlite3 commits each ALTER TABLE
+        # on its own, so manage the transaction explicitly and add both
+        # columns in one commit
+        conn = sqlite3.connect(db_path, isolation_level=None)
         cursor = conn.cursor()
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("BEGIN")
         
-        # Check if columns already exist in file table
-        cursor.execute("PRAGMA table_info(file)")
-        file_columns = [column[1] for column in cursor.fetchall()]
-        
-        # Check if columns already exist in file_version table
-        cursor.execute("PRAGMA table_info(file_version)")
-        file_version_columns = [column[1] for column in cursor.fetchall()]
-        
-        # Add rtf_content column to file table if it doesn't exist
-        if 'rtf_content' not in file_columns:
-            print("Adding rtf_content column to file table...")
-            cursor.execute('ALTER TABLE file ADD COLUMN rtf_content TEXT')
-            print("Done.")
-        else:
-            print("rtf_content column already exists in file table.")
-        
-        # Add rtf_content column to file_version table if it doesn't exist
-        if 'rtf_content' not in file_version_columns:
-            print("Adding rtf_content column to file_version table...")
-            cursor.execute('ALTER TABLE file_version ADD COLUMN rtf_content TEXT')
-            print("Done.")
-        else:
-            print("rtf_content column already exists in file_version table.")
+        # Add rtf_content column to each table if it doesn't exist
+        for table in ('file', 'file_version'):
+            cursor.execute("SELECT 1 FROM pragma_table_info(?) WHERE name = 'rtf_content'", (table,))
+            if cursor.fetchone() is None:
+                print(f"Adding rtf_content column to {table} table...")
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN rtf_content TEXT')
+                print("Done.")
+            else:
+                print(f"rtf_content column already exists in {table} table.")
         
         # Commit changes and close
-        conn.commit()
+        cursor.execute("COMMIT")
         conn.close()
         
         print("Database migration completed successfully.")
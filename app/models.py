@@ -30,20 +30,27 @@ class File(db.Model):
     file_path = db.Column(db.String(200), nullable=False)
     file_type = db.Column(db.String(20), nullable=False)
     content = db.Column(db.Text, nullable=True)
-    rtf_content = db.Column(db.Text, nullable=True)  # Add this line for RTF content
+    # RTF source is only needed when a single file is shown, edited or
+    # exported, so it isn't loaded with the rest of the row
+    rtf_content = db.deferred(db.Column(db.Text, nullable=True))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     versions = db.relationship('FileVersion', backref='file', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Exports read a project's files newest first
+    __table_args__ = (db.Index('ix_file_project_updated', 'project_id', 'updated_at'),)
+    
     def __repr__(self):
         return f'<File {self.filename}>'
 
 class FileVersion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     version_number = db.Column(db.Integer, nullable=False)
-    content = db.Column(db.Text, nullable=True)
-    rtf_content = db.Column(db.Text, nullable=True)  # Add this line for RTF content
+    # Version histories list only the metadata, so the bodies are loaded
+    # together on first access
+    content = db.deferred(db.Column(db.Text, nullable=True), group='body')
+    rtf_content = db.deferred(db.Column(db.Text, nullable=True), group='body')
     file_path = db.Column(db.String(200), nullable=False)
     commit_message = db.Column(db.String(200), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
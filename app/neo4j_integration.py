@@ -1,6 +1,46 @@
 from py2neo import Graph, Node, Relationship
 from flask import current_app
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Node keys that every MERGE matches on; unique constraints give each one an
+# index, so the MERGEs look nodes up instead of scanning the label
+_UNIQUE_KEYS = (
+    ('User', 'user_id'),
+    ('Project', 'project_id'),
+    ('File', 'file_id'),
+    ('Version', 'version_id'),
+    ('Keyword', 'name'),
+)
+
+# Graph connections, one per server and account, shared across requests so
+# their pooled Bolt connections stay open between calls
+_graphs = {}
+
+def _create_constraints(graph):
+    """Create the unique constraints on the node keys, if they don't exist yet"""
+    for label, key in _UNIQUE_KEYS:
+        try:
+            graph.run(
+                f"CREATE CONSTRAINT {label.lower()}_{key} IF NOT EXISTS "
+                f"FOR (n:{label}) REQUIRE n.{key} IS UNIQUE"
+            )
+        except Exception as e:
+            # Nodes merged on more than their key before the constraints
+            # existed can be duplicated; the MERGEs still work, just unindexed
+            logger.warning("Could not create unique constraint on %s.%s: %s", label, key, e)
+
+def _graph(uri, user, password):
+    """Return the shared Graph for a server and account"""
+    key = (uri, user, password)
+    graph = _graphs.get(key)
+    if graph is None:
+        graph = Graph(uri=uri, user=user, password=password)
+        _create_constraints(graph)
+        _graphs[key] = graph
+    return graph
 
 class Neo4jIntegration:
     def __init__(self):
@@ -8,12 +48,13 @@ class Neo4jIntegration:
         self.uri = current_app.config['NEO4J_URI']
         self.user = current_app.config['NEO4J_USER']
         self.password = current_app.config['NEO4J_PASSWORD']
-        self.graph = Graph(uri=self.uri, user=self.user, password=self.password)
+        self.graph = _graph(self.uri, self.user, self.password)
     
     def create_user_node(self, user_id, username):
         """Create a user node in Neo4j"""
         query = """
-        MERGE (u:User {user_id: $user_id, username: $username})
+        MERGE (u:User {user_id: $user_id})
+        SET u.username = $username
         RETURN u
         """
         result = self.graph.run(query, user_id=user_id, username=username).data()
@@ -24,7 +65,8 @@ class Neo4jIntegration:
         # Create project node
         query = """
         MATCH (u:User {user_id: $user_id})
-        MERGE (p:Project {project_id: $project_id, name: $name, description: $description})
+        MERGE (p:Project {project_id: $project_id})
+        SET p.name = $name, p.description = $description
         MERGE (u)-[:OWNS]->(p)
         RETURN p
         """
@@ -40,8 +82,8 @@ class Neo4jIntegration:
         # Create file node
         query = """
         MATCH (p:Project {project_id: $project_id})
-        MERGE (f:File {file_id: $file_id, filename: $filename, file_type: $file_type})
-        SET f.content = $content
+        MERGE (f:File {file_id: $file_id})
+        SET f.filename = $filename, f.file_type = $file_type, f.content = $content
         MERGE (p)-[:CONTAINS]->(f)
         RETURN f
         """
@@ -57,8 +99,8 @@ class Neo4jIntegration:
         """Create a version node in Neo4j and link to file"""
         query = """
         MATCH (f:File {file_id: $file_id})
-        MERGE (v:Version {version_id: $version_id, version_number: $version_number, commit_message: $commit_message})
-        SET v.content = $content
+        MERGE (v:Version {version_id: $version_id})
+        SET v.version_number = $version_number, v.commit_message = $commit_message, v.content = $content
         MERGE (f)-[:HAS_VERSION]->(v)
         RETURN v
         """
@@ -83,8 +125,14 @@ class Neo4jIntegration:
     
     def add_keywords_from_content(self, file_id, content, keywords):
         """Add keywords extracted from content and link to a file"""
-        for keyword in keywords:
-            self.add_keyword_to_file(file_id, keyword)
+        # One round trip and one transaction for all keywords
+        query = """
+        MATCH (f:File {file_id: $file_id})
+        UNWIND $keywords AS keyword
+        MERGE (k:Keyword {name: keyword})
+        MERGE (f)-[:HAS_KEYWORD]->(k)
+        """
+        self.graph.run(query, file_id=file_id, keywords=list(keywords))
     
     def find_related_files(self, keywords, limit=10):
         """Find files related to the given keywords"""
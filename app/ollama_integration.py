@@ -1,19 +1,214 @@
 import requests
 import json
-import base64
+import re
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
 from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import shutil
 import time
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    # Faster JSON, mainly for parsing the float arrays /api/embed returns
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    _json_loads = json.loads
+
+try:
+    # SIMD base64 encoder, several times faster than the standard library's
+    # on the multi-megabyte images sent for analysis
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
+logger = logging.getLogger(__name__)
+
+# HTTP session shared by every OllamaIntegration, so calls reuse pooled
+# keep-alive connections to the server instead of opening one each. Only
+# failed connects are retried; POSTs that reached the server are not resent
+_SESSION = requests.Session()
+for _prefix in ('http://', 'https://'):
+    _SESSION.mount(_prefix, HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=100,
+        max_retries=Retry(total=2, backoff_factor=0.2)
+    ))
+atexit.register(_SESSION.close)
+
+# Fail fast if the server is down, but let long generations run to completion
+_TIMEOUT = (3, None)
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+def _post_json(url, payload, **kwargs):
+    """POST a payload to the Ollama server as JSON"""
+    return _SESSION.post(url, data=_json_dumps(payload), headers=_JSON_HEADERS, timeout=_TIMEOUT, **kwargs)
+
+# Successful responses, keyed on everything sent to the model, so prompts
+# repeated within the hour (e.g. keywords for a file saved unchanged) don't
+# run the model again. The least recently used entry is dropped when full.
+RESPONSE_CACHE_TTL = 3600
+RESPONSE_CACHE_SIZE = 1024
+_response_cache = OrderedDict()  # key -> (expiry time, value)
+_response_cache_lock = threading.Lock()
+response_cache_stats = {'hits': 0, 'misses': 0}
+
+def _response_key(model, prompt, max_tokens=None, image_digest=None, kind='generate'):
+    """Hash a request's model, prompt, token limit and image digest into a cache key
+    
+    kind separates responses that are cut short, like streamed scores, from
+    full responses to the same prompt.
+    """
+    request = {
+        'kind': kind,
+        'model': model,
+        'prompt': prompt,
+        'max_tokens': max_tokens,
+        'image': image_digest
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+
+def _cache_get(key):
+    """Get a cached response if it hasn't expired"""
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            _response_cache.move_to_end(key)
+            response_cache_stats['hits'] += 1
+            return entry[1]
+        response_cache_stats['misses'] += 1
+        return None
+
+def _cache_set(key, value):
+    """Cache a response for RESPONSE_CACHE_TTL seconds"""
+    with _response_cache_lock:
+        _response_cache[key] = (time.monotonic() + RESPONSE_CACHE_TTL, value)
+        _response_cache.move_to_end(key)
+        if len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+# Embeddings of queries and project texts. They don't change for a given
+# model and text, so they never expire; repeated searches only embed the
+# query and projects edited since the last search.
+EMBEDDING_CACHE_SIZE = 4096
+_embedding_cache = OrderedDict()  # key -> vector
+
+def _embedding_get(key):
+    """Get a cached embedding"""
+    with _response_cache_lock:
+        embedding = _embedding_cache.get(key)
+        if embedding is not None:
+            _embedding_cache.move_to_end(key)
+        return embedding
+
+def _embedding_set(key, embedding):
+    """Cache an embedding, dropping the least recently used one if full"""
+    with _response_cache_lock:
+        _embedding_cache[key] = embedding
+        if len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+            _embedding_cache.popitem(last=False)
+
+def clear_response_cache():
+    """Forget all cached responses and embeddings"""
+    with _response_cache_lock:
+        _response_cache.clear()
+        _embedding_cache.clear()
+
+# Bytes of an image read at a time when hashing or sending it. A multiple of
+# 3, so every chunk encodes to base64 without padding and the encoded chunks
+# join into one valid string
+_IMAGE_CHUNK_SIZE = 3 * 64 * 1024
+
+def _read_chunks(path):
+    """Yield a file's contents _IMAGE_CHUNK_SIZE bytes at a time"""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_IMAGE_CHUNK_SIZE), b''):
+            yield chunk
+
+def _file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    for chunk in _read_chunks(path):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def _image_request_body(payload, image_path):
+    """Yield a request's JSON body with the image's base64 added as 'images'
+    
+    The image is read and encoded a chunk at a time as the body is sent, so
+    neither the image nor its base64 is held in memory whole.
+    """
+    yield _json_dumps(payload)[:-1] + b', "images": ["'
+    for chunk in _read_chunks(image_path):
+        yield b64encode(chunk)
+    yield b'"]}'
+
+# A number in a model's reply, the first of which is taken as its score
+_SCORE_RE = re.compile(r'\d+(?:\.\d+)?')
+
+def _has_complete_score(text):
+    """Whether text has a number that further streamed text can't extend"""
+    match = _SCORE_RE.search(text)
+    if match is None:
+        return False
+    end = match.end()
+    # A number at the end, or followed by a bare ".", may still grow digits
+    return end < len(text) and (text[end] != '.' or end + 1 < len(text))
+
+# Words compared between a query and a project before asking the model to
+# score it; shorter ones are mostly stop words
+_WORD_RE = re.compile(r'[a-z0-9]{3,}')
+
+def _words(text):
+    """Return the set of lowercased words in text"""
+    return frozenset(_WORD_RE.findall(text.lower()))
+
+def _project_words(project):
+    """Return the set of words in the parts of a project the model is shown"""
+    parts = [project['name'], project['description'] or '']
+    for file in project.get('files', []):
+        parts.append(file['filename'])
+        if file.get('content'):
+            parts.append(file['content'][:500])
+    return _words(' '.join(parts))
 
 class OllamaIntegration:
     def __init__(self):
         """Initialize Ollama API connection using app configuration"""
         self.api_url = current_app.config['OLLAMA_API_URL']
         self.model = current_app.config['OLLAMA_MODEL']
+        self.num_parallel = current_app.config.get('OLLAMA_NUM_PARALLEL', 4)
+        self.embed_model = current_app.config.get('OLLAMA_EMBED_MODEL', 'nomic-embed-text')
+        # The embedding endpoint lives next to the generate one
+        self.embed_url = self.api_url.rsplit('/api/', 1)[0] + '/api/embed'
+    
+    @staticmethod
+    def close():
+        """Close the pooled connections to the Ollama server"""
+        _SESSION.close()
     
     def generate_text(self, prompt, max_tokens=1000):
         """Generate text using Ollama model"""
         try:
+            cache_key = _response_key(self.model, prompt, max_tokens)
+            cached = _cache_get(cache_key)
+            if cached is not None:
+                return {
+                    'success': True,
+                    'text': cached
+                }
+            
             payload = {
                 'model': self.model,
                 'prompt': prompt,
@@ -21,12 +216,14 @@ class OllamaIntegration:
                 'stream': False
             }
             
-            response = requests.post(self.api_url, json=payload)
+            response = _post_json(self.api_url, payload)
             
             if response.status_code == 200:
+                text = _json_loads(response.content).get('response', '')
+                _cache_set(cache_key, text)
                 return {
                     'success': True,
-                    'text': response.json().get('response', '')
+                    'text': text
                 }
             else:
                 return {
@@ -42,29 +239,25 @@ class OllamaIntegration:
     def analyze_image(self, image_path):
         """Analyze an image using Ollama multimodal capabilities"""
         try:
-            # Read the image file
-            with open(image_path, 'rb') as img_file:
-                img_data = img_file.read()
-            
-            # Base64 encode the image
-            img_base64 = base64.b64encode(img_data).decode('utf-8')
-            
             # Create the prompt for image analysis
             prompt = "Analyze this image and describe what you see. Extract any visible text, describe key elements, and identify potential scientific content."
             
-            payload = {
-                'model': self.model,
-                'prompt': prompt,
-                'images': [img_base64],
-                'stream': False
-            }
+            cache_key = _response_key(self.model, prompt, image_digest=_file_digest(image_path))
+            cached = _cache_get(cache_key)
+            if cached is not None:
+                return {
+                    'success': True,
+                    'analysis': cached
+                }
             
-            response = requests.post(self.api_url, json=payload)
+            response = self._post_with_image(prompt, image_path)
             
             if response.status_code == 200:
+                analysis = _json_loads(response.content).get('response', '')
+                _cache_set(cache_key, analysis)
                 return {
                     'success': True,
-                    'analysis': response.json().get('response', '')
+                    'analysis': analysis
                 }
             else:
                 return {
@@ -77,6 +270,70 @@ class OllamaIntegration:
                 'error': str(e)
             }
     
+    def _generate_score(self, prompt):
+        """Generate the reply to a relevance prompt, up to its first number
+        
+        The reply is streamed and the request closed once the first number in
+        it is complete, so the model isn't left to explain its score.
+        """
+        try:
+            cache_key = _response_key(self.model, prompt, 100, kind='score')
+            cached = _cache_get(cache_key)
+            if cached is not None:
+                return {
+                    'success': True,
+                    'text': cached
+                }
+            
+            payload = {
+                'model': self.model,
+                'prompt': prompt,
+                'max_tokens': 100,
+                'stream': True
+            }
+            
+            with _post_json(self.api_url, payload, stream=True) as response:
+                if response.status_code != 200:
+                    return {
+                        'success': False,
+                        'error': f"API Error: {response.status_code} - {response.text}"
+                    }
+                
+                text = ''
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = _json_loads(line)
+                    text += chunk.get('response', '')
+                    if chunk.get('done') or _has_complete_score(text):
+                        break
+            
+            _cache_set(cache_key, text)
+            return {
+                'success': True,
+                'text': text
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def _post_with_image(self, prompt, image_path):
+        """Send a generate request with an image, streaming the image from disk"""
+        payload = {
+            'model': self.model,
+            'prompt': prompt,
+            'stream': False
+        }
+        
+        return _SESSION.post(
+            self.api_url,
+            data=_image_request_body(payload, image_path),
+            headers=_JSON_HEADERS,
+            timeout=_TIMEOUT
+        )
+    
     def extract_keywords(self, text, max_keywords=10):
         """Extract keywords from text using Ollama model"""
         try:
@@ -132,29 +389,14 @@ class OllamaIntegration:
             # Note: This is a simplified version assuming Ollama can do this
             # In a real implementation, you might need more complex processing
             
-            # Read the image file
-            with open(input_path, 'rb') as img_file:
-                img_data = img_file.read()
-            
-            # Base64 encode the image
-            img_base64 = base64.b64encode(img_data).decode('utf-8')
-            
             # Create the prompt for image enhancement
             prompt = "Convert this image to a clean vector line art style. Maintain the key features and details but create a simplified line drawing version suitable for a laboratory notebook."
             
-            payload = {
-                'model': self.model,
-                'prompt': prompt,
-                'images': [img_base64],
-                'stream': False
-            }
-            
-            response = requests.post(self.api_url, json=payload)
+            response = self._post_with_image(prompt, input_path)
             
             if response.status_code == 200:
                 # In a real implementation, you would parse the response to get the processed image
                 # For now, we'll just simulate this by copying the original image
-                import shutil
                 shutil.copy(input_path, output_path)
                 
                 return {
@@ -172,11 +414,48 @@ class OllamaIntegration:
                 'error': str(e)
             }
     
+    def embed_batch(self, texts):
+        """Embed a list of texts in one request using the Ollama embedding model
+        
+        Texts embedded before are taken from the cache; only the rest are sent.
+        """
+        try:
+            keys = [_response_key(self.embed_model, text, kind='embed') for text in texts]
+            embeddings = [_embedding_get(key) for key in keys]
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            
+            if missing:
+                payload = {
+                    'model': self.embed_model,
+                    'input': [texts[i] for i in missing]
+                }
+                
+                response = _post_json(self.embed_url, payload)
+                
+                if response.status_code != 200:
+                    return {
+                        'success': False,
+                        'error': f"API Error: {response.status_code} - {response.text}"
+                    }
+                
+                for i, embedding in zip(missing, _json_loads(response.content)['embeddings']):
+                    embeddings[i] = np.asarray(embedding, dtype=np.float32)
+                    _embedding_set(keys[i], embeddings[i])
+            
+            return {
+                'success': True,
+                'embeddings': np.stack(embeddings)
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
     def search_projects(self, query_text, projects_data):
         """Search for relevant projects and files using semantic search"""
         try:
-            # For each project, generate a comparison with the query
-            results = []
+            project_texts = []
             
             for project in projects_data:
                 # Combine project name, description, and file info
@@ -188,39 +467,23 @@ class OllamaIntegration:
                         file_text += f"Content: {file['content'][:500]}...\n"
                     project_text += file_text
                 
-                # Create prompt to determine relevance
-                prompt = f"""On a scale of 0 to 10, how relevant is the following research project to this query: "{query_text}"?
-                
-                {project_text}
-                
-                Return only a number from 0 to 10, where 10 is highly relevant and 0 is not relevant at all."""
-                
-                # Get relevance score
-                response = self.generate_text(prompt, max_tokens=100)
-                
-                if response['success']:
-                    try:
-                        # Extract the numeric score
-                        score_text = response['text'].strip()
-                        # Find the first number in the response
-                        import re
-                        score_match = re.search(r'\d+(\.\d+)?', score_text)
-                        
-                        if score_match:
-                            score = float(score_match.group())
-                            # Only include if score is above threshold
-                            if score > 3:  # Adjust threshold as needed
-                                results.append({
-                                    'project': project,
-                                    'relevance_score': score
-                                })
-                    except Exception as parse_err:
-                        # If parsing fails, use a default score
-                        results.append({
-                            'project': project,
-                            'relevance_score': 5.0,  # Default middle score
-                            'parse_error': str(parse_err)
-                        })
+                project_texts.append(project_text)
+            
+            if not project_texts:
+                return {
+                    'success': True,
+                    'results': []
+                }
+            
+            # Embed the query and every project in one request; if the
+            # embedding model isn't available, ask the chat model instead
+            embedded = self.embed_batch([query_text] + project_texts)
+            
+            if embedded['success']:
+                results = self._rank_by_similarity(projects_data, embedded['embeddings'])
+            else:
+                logger.warning("Embedding search failed, scoring with %s instead: %s", self.model, embedded['error'])
+                results = self._rank_by_generation(query_text, projects_data, project_texts)
             
             # Sort results by relevance score
             results.sort(key=lambda x: x['relevance_score'], reverse=True)
@@ -234,3 +497,89 @@ class OllamaIntegration:
                 'success': False,
                 'error': str(e)
             }
+    
+    def _rank_by_similarity(self, projects_data, embeddings):
+        """Score projects by the cosine similarity of their embedding to the query's
+        
+        The first embedding is the query's, the rest follow projects_data.
+        """
+        # Normalise every vector once, so the dot products are cosines
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.maximum(norms, 1e-12)
+        similarities = embeddings[1:] @ embeddings[0]
+        
+        results = []
+        
+        for project, similarity in zip(projects_data, similarities.tolist()):
+            # Put the similarity on the same 0 to 10 scale as generated scores
+            score = round(10 * max(similarity, 0.0), 2)
+            # Only include if score is above threshold
+            if score > 3:  # Adjust threshold as needed
+                results.append({
+                    'project': project,
+                    'relevance_score': score
+                })
+        
+        return results
+    
+    def _rank_by_generation(self, query_text, projects_data, project_texts):
+        """Score projects by asking the model to rate each one against the query"""
+        # Projects that share no word with the query would score 0 and be
+        # dropped anyway, so only ask the model about the rest
+        query_words = _words(query_text)
+        if query_words:
+            candidates = [
+                (project, project_text)
+                for project, project_text in zip(projects_data, project_texts)
+                if query_words & _project_words(project)
+            ]
+            projects_data = [project for project, _ in candidates]
+            project_texts = [project_text for _, project_text in candidates]
+        
+        # For each project, generate a comparison with the query
+        prompts = []
+        
+        for project_text in project_texts:
+            # Create prompt to determine relevance
+            prompt = f"""On a scale of 0 to 10, how relevant is the following research project to this query: "{query_text}"?
+            
+            {project_text}
+            
+            Return only a number from 0 to 10, where 10 is highly relevant and 0 is not relevant at all."""
+            prompts.append(prompt)
+        
+        # Score the projects concurrently, so the server can work on as
+        # many prompts at once as it has parallel slots for
+        with ThreadPoolExecutor(max_workers=self.num_parallel) as executor:
+            responses = list(executor.map(
+                self._generate_score,
+                prompts
+            ))
+        
+        results = []
+        
+        for project, response in zip(projects_data, responses):
+            if response['success']:
+                try:
+                    # Extract the numeric score
+                    score_text = response['text'].strip()
+                    # Find the first number in the response
+                    score_match = _SCORE_RE.search(score_text)
+                    
+                    if score_match:
+                        score = float(score_match.group())
+                        # Only include if score is above threshold
+                        if score > 3:  # Adjust threshold as needed
+                            results.append({
+                                'project': project,
+                                'relevance_score': score
+                            })
+                except Exception as parse_err:
+                    # If parsing fails, use a default score
+                    results.append({
+                        'project': project,
+                        'relevance_score': 5.0,  # Default middle score
+                        'parse_error': str(parse_err)
+                    })
+        
+        return results
@@ -1,20 +1,22 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, send_file, current_app, session
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, send_file, current_app, session, after_this_request
 from app.models import User, Project, File, FileVersion
+from sqlalchemy.orm import undefer
 from app import db
-from app.utils import hash_password, verify_password, save_file
+from app.utils import hash_password, verify_password, save_file, make_temp_dir
 from app.neo4j_integration import Neo4jIntegration
 from app.github_integration import GitHubIntegration
 from app.ollama_integration import OllamaIntegration
 from app.latex_export import LatexExport
 import os
 import json
+import shutil
 import hashlib
 import datetime
 from datetime import datetime
 import io
 import re
 from .rtf_handler import is_rtf_content, extract_text_from_rtf, process_rtf_file, handle_content_update
-from .digital_signature import DigitalSignature
+from .digital_signature import get_digital_signature
 
 # Create blueprint
 main_bp = Blueprint('main', __name__)
@@ -34,7 +36,7 @@ def get_latex():
 
 # Initialize signature manager
 def get_signature_manager():
-    return DigitalSignature()
+    return get_digital_signature()
 
 @main_bp.route('/api/create-signature', methods=['POST'])
 def create_signature():
@@ -88,7 +90,7 @@ def verify_signature():
     
     # Verify the signature
     sig_manager = get_signature_manager()
-    is_valid = sig_manager.verify_signature(original_json, signature_b64)
+    is_valid = sig_manager.verify_signature(original_json, signature_b64, signature_data.get('algorithm'))
     
     return jsonify({
         'success': True,
@@ -811,3 +813,85 @@ def update_file(file_id):
         except Exception as rtf_err:
             print(f"Error processing RTF content: {rtf_err}")
             # Keep the original content if extraction fails
+
+# LaTeX export route
+@main_bp.route('/api/projects/<int:project_id>/export/pdf', methods=['GET'])
+def export_to_pdf(project_id):
+    current_app.logger.debug("PDF export requested for project_id: %s", project_id)
+    
+    if 'user_id' not in session:
+        current_app.logger.debug("User not logged in")
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+    
+    user_id = session['user_id']
+    current_app.logger.debug("User ID: %s", user_id)
+    
+    project = Project.query.filter_by(id=project_id, user_id=user_id).first()
+    
+    if not project:
+        current_app.logger.debug("Project %s not found for user %s", project_id, user_id)
+        return jsonify({'success': False, 'message': 'Project not found'}), 404
+    
+    current_app.logger.debug("Project found: %s", project.name)
+    
+    # Get files, newest first as the export lists them
+    files = (File.query.filter_by(project_id=project.id)
+             .options(undefer(File.rtf_content))
+             .order_by(File.updated_at.desc())
+             .all())
+    current_app.logger.debug("Found %d files for project", len(files))
+    
+    try:
+        # Export to PDF
+        latex = get_latex()
+        
+        # Have the PDF moved out of the build directory into one of its own,
+        # so send_file can stream it from disk; remove it once the response
+        # has its open file handle
+        output_dir = make_temp_dir()
+        
+        @after_this_request
+        def remove_output_dir(response):
+            shutil.rmtree(output_dir, ignore_errors=True)
+            return response
+        
+        current_app.logger.debug("Calling export_project_to_pdf")
+        result = latex.export_project_to_pdf(project, files, output_path=os.path.join(output_dir, 'export.pdf'))
+        
+        # Log the result structure
+        if isinstance(result, dict):
+            current_app.logger.debug("Result keys: %s", list(result))
+        else:
+            current_app.logger.error("Result is not a dictionary: %r", result)
+            return jsonify({'success': False, 'message': 'Invalid result format from PDF generator'}), 500
+        
+        # Check success
+        if not result.get('success', False):
+            error_msg = result.get('error', 'Unknown error in PDF generation')
+            current_app.logger.error("PDF export failed: %s", error_msg)
+            return jsonify({'success': False, 'message': error_msg}), 500
+        
+        # Return PDF
+        if 'pdf_path' in result:
+            current_app.logger.debug("Sending PDF from file: %s", result['pdf_path'])
+            return send_file(
+                result['pdf_path'], 
+                download_name=f"{project.name}.pdf",
+                as_attachment=True,
+                mimetype='application/pdf'
+            )
+        elif 'pdf_content' in result and result['pdf_content']:
+            current_app.logger.debug("Sending PDF from memory, size: %d bytes", len(result['pdf_content']))
+            return send_file(
+                io.BytesIO(result['pdf_content']),
+                mimetype='application/pdf',
+                as_attachment=True,
+                download_name=f"{project.name}.pdf"
+            )
+        else:
+            current_app.logger.error("No PDF content found in result")
+            return jsonify({'success': False, 'message': 'PDF was not generated'}), 500
+            
+    except Exception as e:
+        current_app.logger.exception("Exception in PDF export: %s", e)
+        return jsonify({'success': False, 'message': f'Error generating PDF: {str(e)}'}), 500
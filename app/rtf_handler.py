@@ -3,6 +3,9 @@ RTF Handler - Utility functions for working with RTF content
 """
 import re
 
+# RTF header, after any leading whitespace
+_RTF_HEADER_RE = re.compile(r'\s*\{\\rtf')
+
 def is_rtf_content(content):
     """
     Determine if content is in RTF format
@@ -16,8 +19,9 @@ def is_rtf_content(content):
     if not content:
         return False
     
-    # Check if the content starts with the RTF header
-    return content.strip().startswith(r'{\rtf')
+    # Check if the content starts with the RTF header; matching at the start
+    # avoids copying the whole content as strip() would
+    return _RTF_HEADER_RE.match(content) is not None
 
 def extract_text_from_rtf(rtf_content):
     """
@@ -1,9 +1,15 @@
 import os
 import hashlib
+import shutil
+import tempfile
 import requests
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask import current_app
+from flask import current_app, has_app_context
+
+# Worker threads for per-file filesystem work; the work is I/O bound, so use
+# more threads than CPUs
+IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
 
 def hash_password(password):
     """Generate a hashed password using Werkzeug's security functions"""
@@ -38,6 +44,49 @@ def save_file(file, upload_folder):
         return original_filename, safe_filename, file_path
     return None, None, None
 
+def make_temp_dir():
+    """Create a scratch directory, on tmpfs when one is available
+    
+    Export and GitHub staging files are deleted straight afterwards, so they
+    never need to reach the disk. Set ELN_TMPFS_DIR to '' to use the system
+    temp directory instead; it is also used if the directory isn't writable.
+    """
+    base = current_app.config.get('ELN_TMPFS_DIR', '/dev/shm') if has_app_context() else '/dev/shm'
+    if not base or not os.path.isdir(base) or not os.access(base, os.W_OK | os.X_OK):
+        base = None
+    return tempfile.mkdtemp(dir=base)
+
+def copy_file_contents(src, dst):
+    """Copy a file's contents, but not its metadata, without going through Python
+    
+    copy_file_range lets the kernel copy (or reflink) the data directly;
+    shutil.copyfile, which uses sendfile on Linux, is the fallback.
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            return
+        except OSError:
+            # Not supported between these filesystems or by this kernel
+            pass
+    shutil.copyfile(src, dst)
+
+def write_text_file(path, text):
+    """Write text to a file as UTF-8 with a single raw write"""
+    data = memoryview(text.encode('utf-8'))
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
 def enhance_image_with_stable_diffusion(input_path, output_path):
     """Enhance an image using a local Stable Diffusion model"""
     try:
@@ -20,6 +20,16 @@ class Config:
     # Ollama API configuration
     OLLAMA_API_URL = os.environ.get('OLLAMA_API_URL') or 'http://localhost:11434/api/generate'
     OLLAMA_MODEL = os.environ.get('OLLAMA_MODEL') or 'mistral-small3.1'
+    # Model used to embed projects and queries for semantic search
+    OLLAMA_EMBED_MODEL = os.environ.get('OLLAMA_EMBED_MODEL') or 'nomic-embed-text'
+    # Prompts sent at once; match the server's OLLAMA_NUM_PARALLEL setting
+    OLLAMA_NUM_PARALLEL = int(os.environ.get('OLLAMA_NUM_PARALLEL') or 4)
+    
+    # LaTeX engine for PDF export: pdflatex, latexmk or tectonic
+    LATEX_ENGINE = os.environ.get('LATEX_ENGINE') or 'pdflatex'
+    
+    # Scratch space for exports and GitHub staging; '' uses the system temp directory
+    ELN_TMPFS_DIR = os.environ.get('ELN_TMPFS_DIR', '/dev/shm')
     
     # Stable Diffusion configuration
     STABLE_DIFFUSION_API_URL = os.environ.get('STABLE_DIFFUSION_API_URL') or 'http://localhost:7860/api/predict'
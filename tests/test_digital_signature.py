@@ -0,0 +1,134 @@
+import unittest
+import json
+import base64
+
+from cryptography.hazmat.primitives import serialization
+
+from app import create_app
+from app.digital_signature import DigitalSignature, get_digital_signature
+from config import Config
+
+
+class TestConfig(Config):
+    """Test configuration."""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+
+class TestDigitalSignature(unittest.TestCase):
+    """Test cases for digital signatures."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.sig_manager = DigitalSignature()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.app_context.pop()
+
+    def _signed_json(self, signature):
+        """Rebuild the JSON string that was signed, as the verify route does."""
+        return json.dumps({
+            'username': signature['username'],
+            'timestamp': signature['timestamp'],
+            'data': signature['data']
+        }, sort_keys=True)
+
+    def test_sign_and_verify_ed25519(self):
+        """Test an Ed25519 signature round trip."""
+        timestamp = self.sig_manager.create_timestamp()
+        signature = self.sig_manager.create_signature('testuser', timestamp, {'file_id': 1})
+        self.assertEqual(signature['algorithm'], 'Ed25519')
+
+        original_json = self._signed_json(signature)
+        self.assertTrue(self.sig_manager.verify_signature(original_json, signature['signature'], 'Ed25519'))
+        self.assertTrue(self.sig_manager.verify_signature(original_json, signature['signature']))
+
+        # Tampered data must not verify
+        tampered_json = original_json.replace('testuser', 'otheruser')
+        self.assertFalse(self.sig_manager.verify_signature(tampered_json, signature['signature']))
+
+    def test_ed25519_public_key_exported(self):
+        """Test that the exported Ed25519 public key verifies signatures on its own."""
+        timestamp = self.sig_manager.create_timestamp()
+        signature = self.sig_manager.create_signature('testuser', timestamp, {'file_id': 1})
+
+        with open(self.sig_manager.ed25519_public_key_path, 'rb') as key_file:
+            public_key = serialization.load_pem_public_key(key_file.read())
+
+        # Raises InvalidSignature if the key doesn't match
+        public_key.verify(
+            base64.b64decode(signature['signature']),
+            self._signed_json(signature).encode('utf-8')
+        )
+
+    def test_sign_and_verify_rsa(self):
+        """Test an RSA signature round trip."""
+        self.sig_manager.ed_private_key = None
+
+        timestamp = self.sig_manager.create_timestamp()
+        signature = self.sig_manager.create_signature('testuser', timestamp, {'file_id': 1})
+        self.assertEqual(signature['algorithm'], 'RSA-PSS')
+
+        original_json = self._signed_json(signature)
+        self.assertTrue(self.sig_manager.verify_signature(original_json, signature['signature']))
+
+        # Tampered data must not verify
+        tampered_json = original_json.replace('testuser', 'otheruser')
+        self.assertFalse(self.sig_manager.verify_signature(tampered_json, signature['signature']))
+
+    def test_verify_maximum_length_salt(self):
+        """Test signatures made with the older maximum-length PSS salt still verify."""
+        import base64
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        original_json = json.dumps({'username': 'testuser', 'timestamp': 'now', 'data': None}, sort_keys=True)
+        signature = self.sig_manager.private_key.sign(
+            original_json.encode('utf-8'),
+            padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
+            hashes.SHA256()
+        )
+        signature_b64 = base64.b64encode(signature).decode('utf-8')
+        self.assertTrue(self.sig_manager.verify_signature(original_json, signature_b64))
+
+    def test_sign_and_verify_hmac_fallback(self):
+        """Test the HMAC fallback when no keys are available."""
+        self.sig_manager.private_key = None
+        self.sig_manager.public_key = None
+        self.sig_manager.ed_private_key = None
+        self.sig_manager.ed_public_key = None
+        self.sig_manager._signer = None
+        self.sig_manager._verifier = None
+
+        timestamp = self.sig_manager.create_timestamp()
+        signature = self.sig_manager.create_signature('testuser', timestamp, {'file_id': 1})
+        self.assertEqual(signature['algorithm'], 'HMAC-SHA256')
+
+        original_json = self._signed_json(signature)
+        self.assertTrue(self.sig_manager.verify_signature(original_json, signature['signature']))
+        self.assertFalse(self.sig_manager.verify_signature(original_json, '0' * 64))
+
+    def test_shared_instance(self):
+        """Test the shared signature manager is created once."""
+        self.assertIs(get_digital_signature(), get_digital_signature())
+
+    def test_format_signature_for_latex(self):
+        """Test LaTeX formatting escapes special characters."""
+        signature = {
+            'username': 'test_user',
+            'timestamp': '2024-01-01T00:00:00',
+            'algorithm': 'RSA-PSS',
+            'signature': 'abc{def}%ghijklmnop'
+        }
+        latex = self.sig_manager.format_signature_for_latex(signature)
+        self.assertIn('Signed by: test\\_user', latex)
+        self.assertIn('Signature: abc\\{def\\}\\%ghijklm...', latex)
+        self.assertEqual(DigitalSignature.tex_escape(None), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
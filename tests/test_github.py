@@ -2,16 +2,22 @@ import unittest
 import os
 import tempfile
 import shutil
+import subprocess
+import time
 from unittest.mock import patch, MagicMock
 
-from app import create_app
-from app.github_integration import GitHubIntegration
+from app import create_app, db
+from app import github_integration
+from app.github_integration import GitHubIntegration, clear_repository_cache
+from app.models import Project, File
 from config import Config
 
 
 class TestConfig(Config):
     """Test configuration."""
     TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    UPLOAD_FOLDER = tempfile.mkdtemp()
     GITHUB_USERNAME = 'test_user'
     GITHUB_SSH_KEY_PATH = os.path.join(tempfile.gettempdir(), 'id_ed25519')
     GITHUB_SSH_PUB_KEY_PATH = os.path.join(tempfile.gettempdir(), 'id_ed25519.pub')
@@ -27,6 +33,7 @@ class TestGitHubIntegration(unittest.TestCase):
         self.app = create_app(TestConfig)
         self.app_context = self.app.app_context()
         self.app_context.push()
+        db.create_all()
         
         # Create test SSH keys
         with open(TestConfig.GITHUB_SSH_KEY_PATH, 'w') as f:
@@ -35,12 +42,15 @@ class TestGitHubIntegration(unittest.TestCase):
             f.write('Mock SSH public key content')
         
         self.github_integration = GitHubIntegration()
+        clear_repository_cache()
         
         # Create a temp directory to simulate Git operations
         self.temp_dir = tempfile.mkdtemp()
     
     def tearDown(self):
         """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
         self.app_context.pop()
         
         # Clean up test SSH keys
@@ -52,6 +62,22 @@ class TestGitHubIntegration(unittest.TestCase):
         # Clean up temp directory
         if os.path.exists(self.temp_dir):
             shutil.rmtree(self.temp_dir)
+        
+        # Clean up imported files
+        for file in os.listdir(TestConfig.UPLOAD_FOLDER):
+            os.remove(os.path.join(TestConfig.UPLOAD_FOLDER, file))
+    
+    def fake_clone(self, repo_files):
+        """Return a stand-in for make_temp_dir that creates a clone holding repo_files"""
+        def make_clone():
+            clone_dir = tempfile.mkdtemp(dir=self.temp_dir)
+            for rel_path, data in repo_files.items():
+                path = os.path.join(clone_dir, rel_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(data)
+            return clone_dir
+        return make_clone
     
     @patch('subprocess.run')
     def test_verify_ssh_setup(self, mock_run):
@@ -70,6 +96,16 @@ class TestGitHubIntegration(unittest.TestCase):
         self.assertFalse(result['success'])
         self.assertIn('error', result)
     
+    def test_ssh_host_key_checked(self):
+        """Test that git and the SSH probe never skip GitHub's host key check."""
+        git_ssh_command = self.github_integration._ssh_env()['GIT_SSH_COMMAND']
+        
+        self.assertIn('StrictHostKeyChecking=accept-new', git_ssh_command)
+        self.assertNotIn('StrictHostKeyChecking=no', git_ssh_command)
+        self.assertIn('ControlMaster=auto', git_ssh_command)
+        self.assertIn('StrictHostKeyChecking=accept-new', self.github_integration.ssh_options)
+        self.assertNotIn('StrictHostKeyChecking=no', self.github_integration.ssh_options)
+    
     @patch('subprocess.run')
     def test_create_repository_with_github_cli(self, mock_run):
         """Test repository creation with GitHub CLI."""
@@ -114,6 +150,24 @@ class TestGitHubIntegration(unittest.TestCase):
         exists = self.github_integration.check_repository_exists('non-existing-repo')
         self.assertFalse(exists)
     
+    def test_check_repository_exists_with_api(self):
+        """Test repository existence check through the GitHub API."""
+        from github import UnknownObjectException
+        
+        self.github_integration.github = MagicMock()
+        self.github_integration.user = MagicMock()
+        self.github_integration.user.login = 'test_user'
+        
+        exists = self.github_integration.check_repository_exists('existing-repo')
+        self.assertTrue(exists)
+        self.github_integration.github.get_repo.assert_called_once_with('test_user/existing-repo')
+        self.github_integration.user.get_repos.assert_not_called()
+        
+        # Missing repositories come back as 404
+        self.github_integration.github.get_repo.side_effect = UnknownObjectException(404, 'Not Found', None)
+        exists = self.github_integration.check_repository_exists('non-existing-repo')
+        self.assertFalse(exists)
+    
     @patch('subprocess.run')
     @patch('json.loads')
     def test_get_repository_details(self, mock_json_loads, mock_run):
@@ -142,6 +196,73 @@ class TestGitHubIntegration(unittest.TestCase):
         self.assertFalse(result['success'])
         self.assertIn('error', result)
     
+    def test_repository_cache_eviction(self):
+        """Test expired and least recently used lookups are dropped from the cache."""
+        github_integration._cache_set(('repo', 'old'), 'Old repo')
+        later = time.monotonic() + github_integration.REPO_CACHE_TTL + 1
+        with patch('app.github_integration.time.monotonic', return_value=later):
+            self.assertIsNone(github_integration._cache_get(('repo', 'old')))
+        self.assertNotIn(('repo', 'old'), github_integration._repo_cache)
+        
+        with patch('app.github_integration.REPO_CACHE_SIZE', 2):
+            github_integration._cache_set(('repo', 'a'), 'A')
+            github_integration._cache_set(('repo', 'b'), 'B')
+            self.assertEqual(github_integration._cache_get(('repo', 'a')), 'A')
+            github_integration._cache_set(('repo', 'c'), 'C')
+        self.assertEqual(list(github_integration._repo_cache), [('repo', 'a'), ('repo', 'c')])
+    
+    @patch('subprocess.run')
+    def test_repository_details_cached(self, mock_run):
+        """Test repeated repository lookups reuse the cached details."""
+        mock_process = MagicMock()
+        mock_process.returncode = 0
+        mock_process.stdout = '{"name": "test-repo", "description": "Test repo", "url": "https://github.com/test_user/test-repo", "sshUrl": "git@github.com:test_user/test-repo.git"}'
+        mock_run.return_value = mock_process
+        
+        self.github_integration.github = None
+        
+        first = self.github_integration.get_repository_details('test-repo')
+        second = self.github_integration.get_repository_details('test-repo')
+        self.assertTrue(first['success'])
+        self.assertEqual(first, second)
+        self.assertTrue(self.github_integration.check_repository_exists('test-repo'))
+        self.assertEqual(mock_run.call_count, 1)
+        
+        # Deleting the repository forgets it
+        self.github_integration.delete_repository('test-repo')
+        mock_process.returncode = 1
+        self.assertFalse(self.github_integration.check_repository_exists('test-repo'))
+    
+    def test_github_client_shared(self):
+        """Test integrations configured with the same token share one API client."""
+        self.app.config['GITHUB_TOKEN'] = 'test-token'
+        first = GitHubIntegration()
+        second = GitHubIntegration()
+        self.assertIsNotNone(first.github)
+        self.assertIs(first.github, second.github)
+    
+    @patch('subprocess.run')
+    def test_get_repository_details_with_api(self, mock_run):
+        """Test repository details come from the API when a token is set."""
+        mock_repo = MagicMock()
+        mock_repo.name = 'test-repo'
+        mock_repo.full_name = 'test_user/test-repo'
+        mock_repo.description = None
+        mock_repo.html_url = 'https://github.com/test_user/test-repo'
+        mock_repo.ssh_url = 'git@github.com:test_user/test-repo.git'
+        
+        self.github_integration.github = MagicMock()
+        self.github_integration.github.get_repo.return_value = mock_repo
+        self.github_integration.user = MagicMock(login='test_user')
+        
+        result = self.github_integration.get_repository_details('test-repo')
+        self.assertTrue(result['success'])
+        self.assertEqual(result['full_name'], 'test_user/test-repo')
+        self.assertEqual(result['description'], '')
+        self.assertEqual(result['ssh_url'], 'git@github.com:test_user/test-repo.git')
+        self.github_integration.github.get_repo.assert_called_once_with('test_user/test-repo')
+        mock_run.assert_not_called()
+    
     @patch('subprocess.run')
     def test_delete_repository(self, mock_run):
         """Test repository deletion."""
@@ -229,77 +350,158 @@ class TestGitHubIntegration(unittest.TestCase):
         self.assertFalse(result['success'])
         self.assertIn('error', result)
     
+    @unittest.skipUnless(shutil.which('git'), 'git is not installed')
+    def test_publish_project_to_local_repository(self):
+        """Test the commit a publish pushes, using a local bare repository as the remote."""
+        remote = os.path.join(self.temp_dir, 'remote.git')
+        subprocess.run(['git', 'init', '-q', '--bare', remote], check=True)
+        
+        image_path = os.path.join(self.temp_dir, 'plot.png')
+        with open(image_path, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n\x00fake')
+        
+        project = MagicMock()
+        project.name = 'Test Project'
+        project.description = 'Test project description'
+        
+        text_file = MagicMock()
+        text_file.filename = 'notes/day1.txt'
+        text_file.file_type = 'text'
+        text_file.content = 'Day one notes\n'
+        
+        image_file = MagicMock()
+        image_file.filename = 'plot.png'
+        image_file.file_type = 'image'
+        image_file.file_path = image_path
+        
+        self.github_integration.get_repository_details = MagicMock(return_value={
+            'success': True,
+            'full_name': 'test_user/eln-test-project',
+            'html_url': 'https://github.com/test_user/eln-test-project',
+            'ssh_url': remote
+        })
+        
+        result = self.github_integration.publish_project_to_github(project, [text_file, image_file])
+        self.assertTrue(result['success'], result.get('error'))
+        
+        def git(*args):
+            return subprocess.run(['git', '--git-dir', remote] + list(args),
+                                  check=True, capture_output=True).stdout
+        
+        self.assertEqual(git('ls-tree', '-r', '--name-only', 'main').decode().split(),
+                         ['README.md', 'notes/day1.txt', 'plot.png'])
+        self.assertEqual(git('show', 'main:notes/day1.txt'), b'Day one notes\n')
+        self.assertEqual(git('show', 'main:plot.png'), b'\x89PNG\r\n\x1a\n\x00fake')
+        self.assertIn(b'# Test Project', git('show', 'main:README.md'))
+        self.assertEqual(git('log', '-1', '--format=%an <%ae>%n%s', 'main').decode().splitlines(),
+                         ['Test User <test@example.com>', 'Publish project: Test Project'])
+    
     @patch('subprocess.run')
-    @patch('os.path.exists')
-    @patch('tempfile.mkdtemp')
-    @patch('shutil.rmtree')
-    @patch('shutil.copy2')
-    @patch('os.walk')
-    def test_import_project_from_github(self, mock_walk, mock_copy2, mock_rmtree, mock_mkdtemp, mock_exists, mock_run):
+    def test_import_project_from_github(self, mock_run):
         """Test project import from GitHub."""
-        # Mock file system
-        mock_exists.return_value = True
-        mock_mkdtemp.return_value = self.temp_dir
+        repo_files = {
+            'README.md': b'# Test repo\n',
+            'test_file.txt': b'Test content\r\n',
+            'test_image.jpg': b'\xff\xd8\xff\xe0\x00\x10JFIF\x00',
+        }
         
-        # Mock Git operations
+        # Mock Git operations; the "clone" is created by make_temp_dir
         mock_process = MagicMock()
         mock_process.returncode = 0
         mock_run.return_value = mock_process
         
-        # Mock file discovery
-        mock_walk.return_value = [
-            (self.temp_dir, [], ['README.md', 'test_file.txt', 'test_image.jpg']),
-        ]
-        
-        # Mock database and models
-        with patch('app.github_integration.Project') as MockProject, \
-             patch('app.github_integration.File') as MockFile, \
-             patch('app.github_integration.db') as mock_db:
-            
-            # Set up mock objects
-            mock_project = MagicMock()
-            mock_project.id = 1
-            MockProject.return_value = mock_project
-            
-            mock_file = MagicMock()
-            mock_file.id = 1
-            MockFile.return_value = mock_file
-            
-            # Test import with HTTPS URL
-            result = self.github_integration.import_project_from_github('https://github.com/test_user/test-repo', 1)
-            self.assertTrue(result['success'])
-            self.assertEqual(result['project'], mock_project)
-            self.assertIn('files', result)
-            
-            # Test import with SSH URL
-            result = self.github_integration.import_project_from_github('git@github.com:test_user/test-repo.git', 1)
-            self.assertTrue(result['success'])
-            self.assertEqual(result['project'], mock_project)
-            self.assertIn('files', result)
-            
-            # Test import with username/repo format
-            result = self.github_integration.import_project_from_github('test_user/test-repo', 1)
-            self.assertTrue(result['success'])
-            self.assertEqual(result['project'], mock_project)
-            self.assertIn('files', result)
-            
-            # Test import with just repo name
-            result = self.github_integration.import_project_from_github('test-repo', 1)
-            self.assertTrue(result['success'])
-            self.assertEqual(result['project'], mock_project)
-            self.assertIn('files', result)
+        with patch('app.github_integration.make_temp_dir', side_effect=self.fake_clone(repo_files)):
+            # Test import with HTTPS URL, SSH URL, username/repo and just the repo name
+            for repo in ('https://github.com/test_user/test-repo',
+                         'git@github.com:test_user/test-repo.git',
+                         'test_user/test-repo',
+                         'test-repo'):
+                result = self.github_integration.import_project_from_github(repo, 1)
+                self.assertTrue(result['success'])
+                self.assertEqual(result['project'].name, 'test-repo')
+                self.assertEqual(result['project'].github_repo, 'test_user/test-repo')
+                
+                files = {file.filename: file for file in result['files']}
+                self.assertEqual(sorted(files), sorted(repo_files))
+                self.assertEqual(files['README.md'].file_type, 'text')
+                self.assertEqual(files['README.md'].content, '# Test repo\n')
+                self.assertEqual(files['test_file.txt'].file_type, 'text')
+                self.assertEqual(files['test_file.txt'].content, 'Test content\n')
+                self.assertEqual(files['test_image.jpg'].file_type, 'image')
+                self.assertIsNone(files['test_image.jpg'].content)
+                
+                # Every file was copied to the upload folder
+                for filename, file in files.items():
+                    self.assertEqual(os.path.dirname(file.file_path), TestConfig.UPLOAD_FOLDER)
+                    with open(file.file_path, 'rb') as f:
+                        self.assertEqual(f.read(), repo_files[filename])
             
             # Test import failure
             mock_process.returncode = 1
-            mock_process.stderr = 'Error cloning repository'
-            
-            mock_db.session.rollback = MagicMock()
+            mock_process.stderr = b'Error cloning repository'
+            project_count = Project.query.count()
             
             result = self.github_integration.import_project_from_github('non-existing-repo', 1)
             self.assertFalse(result['success'])
-            self.assertIn('error', result)
-            mock_db.session.rollback.assert_called_once()
-
+            self.assertIn('Error cloning repository', result['error'])
+            self.assertEqual(Project.query.count(), project_count)
+    
+    @patch('subprocess.run')
+    def test_import_same_named_files(self, mock_run):
+        """Test that same-named files in different directories keep their own copies."""
+        repo_files = {
+            'README.md': b'Top-level readme\n',
+            'docs/README.md': b'Docs readme\n',
+            'src/pkg/__init__.py': b'# package\n',
+            'tests/__init__.py': b'# tests\n',
+        }
+        
+        mock_process = MagicMock()
+        mock_process.returncode = 0
+        mock_run.return_value = mock_process
+        
+        with patch('app.github_integration.make_temp_dir', side_effect=self.fake_clone(repo_files)):
+            result = self.github_integration.import_project_from_github('test_user/test-repo', 1)
+        
+        self.assertTrue(result['success'])
+        files = {file.filename: file for file in result['files']}
+        self.assertEqual(sorted(files), sorted(repo_files))
+        self.assertEqual(len({file.file_path for file in files.values()}), len(repo_files))
+        
+        for filename, file in files.items():
+            self.assertEqual(file.content, repo_files[filename].decode('utf-8'))
+            with open(file.file_path, 'rb') as f:
+                self.assertEqual(f.read(), repo_files[filename])
+    
+    @patch('subprocess.run')
+    def test_import_file_rows(self, mock_run):
+        """Test the File rows written by the bulk insert of an import."""
+        repo_files = {
+            'notes.txt': b'Lab notes\n',
+            'data/results.csv': b'a,b\n1,2\n',
+        }
+        
+        mock_process = MagicMock()
+        mock_process.returncode = 0
+        mock_run.return_value = mock_process
+        
+        with patch('app.github_integration.make_temp_dir', side_effect=self.fake_clone(repo_files)):
+            result = self.github_integration.import_project_from_github('test_user/test-repo', 1)
+        self.assertTrue(result['success'])
+        project_id = result['project'].id
+        
+        # Read the rows back from the database, not the session's objects
+        db.session.expire_all()
+        files = File.query.order_by(File.filename).all()
+        
+        self.assertEqual([file.filename for file in files], ['data/results.csv', 'notes.txt'])
+        for file in files:
+            self.assertEqual(file.project_id, project_id)
+            self.assertEqual(file.file_type, 'text')
+            self.assertEqual(file.content, repo_files[file.filename].decode('utf-8'))
+            self.assertIsNotNone(file.created_at)
+            self.assertIsNotNone(file.updated_at)
+            self.assertEqual(file.versions.count(), 0)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import random
+import re
+
+from app.latex_export import LatexExport
+
+
+# The original single-regex escaper, kept as the reference output
+_REFERENCE_CONV = {
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\^{}',
+    '\\': r'\textbackslash{}',
+    '<': r'\textless{}',
+    '>': r'\textgreater{}',
+}
+_REFERENCE_RE = re.compile('|'.join(re.escape(key) for key in _REFERENCE_CONV))
+
+
+def reference_tex_escape(text):
+    return _REFERENCE_RE.sub(lambda match: _REFERENCE_CONV[match.group()], text)
+
+
+class TestTexEscape(unittest.TestCase):
+    """Test cases for LaTeX escaping."""
+
+    def test_none(self):
+        """Test that None escapes to an empty string."""
+        self.assertEqual(LatexExport.tex_escape(None), '')
+
+    def test_special_characters(self):
+        """Test each special character, including backslashes next to braces."""
+        cases = [
+            'plain text',
+            r'\section{Title}',
+            '{}\\~^',
+            '50% of $10 & #1_a <b> ~x^2',
+            '\\\\{\\}',
+            'textbackslash{}',
+        ]
+        for text in cases:
+            self.assertEqual(LatexExport.tex_escape(text), reference_tex_escape(text), text)
+
+    def test_embedded_nul(self):
+        """Test text containing NUL, which the fast path uses as a placeholder."""
+        cases = [
+            '\x00',
+            'a\x00b',
+            '\\\x00{}',
+            '\x00\\textbackslash{}\x00~^',
+            'line\\\x00\n{\x00}',
+        ]
+        for text in cases:
+            escaped = LatexExport.tex_escape(text)
+            self.assertEqual(escaped, reference_tex_escape(text), repr(text))
+            self.assertEqual(escaped.count('\x00'), text.count('\x00'))
+
+    def test_random_text(self):
+        """Test random strings of special and ordinary characters."""
+        rng = random.Random(1234)
+        alphabet = list(_REFERENCE_CONV) + ['a', ' ', '\n', '\x00', 'é']
+        for _ in range(500):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randrange(40)))
+            self.assertEqual(LatexExport.tex_escape(text), reference_tex_escape(text), repr(text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,251 @@
+import unittest
+import os
+import json
+import base64
+import tempfile
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+
+from app import create_app
+from app.ollama_integration import OllamaIntegration, clear_response_cache, _image_request_body
+from config import Config
+
+
+class TestConfig(Config):
+    """Test configuration."""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+
+def make_response(body=None, status_code=200, lines=None):
+    """Build a mock Ollama response with a JSON body or streamed JSON lines."""
+    response = MagicMock()
+    response.status_code = status_code
+    response.content = json.dumps(body or {}).encode('utf-8')
+    response.text = 'error' if status_code != 200 else ''
+    response.iter_lines.return_value = [json.dumps(line).encode('utf-8') for line in lines or []]
+    # Streamed requests are used as context managers
+    response.__enter__.return_value = response
+    return response
+
+
+@patch('app.ollama_integration._SESSION.post')
+class TestOllamaIntegration(unittest.TestCase):
+    """Test cases for the Ollama integration."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        clear_response_cache()
+        self.ollama = OllamaIntegration()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        clear_response_cache()
+        self.app_context.pop()
+
+    def test_score_cached_apart_from_text(self, mock_post):
+        """Test that a streamed score isn't returned as the full reply to the same prompt."""
+        prompt = 'How relevant is this project?'
+        mock_post.return_value = make_response(lines=[
+            {'response': '7'},
+            {'response': ' because'},
+            {'response': ' it matches', 'done': True}
+        ])
+        self.assertEqual(self.ollama._generate_score(prompt)['text'], '7 because')
+
+        mock_post.return_value = make_response({'response': '7 because it matches'})
+        result = self.ollama.generate_text(prompt, max_tokens=100)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['text'], '7 because it matches')
+        self.assertEqual(mock_post.call_count, 2)
+
+        # Both are now served from the cache
+        self.assertEqual(self.ollama._generate_score(prompt)['text'], '7 because')
+        self.assertEqual(self.ollama.generate_text(prompt, max_tokens=100)['text'], '7 because it matches')
+        self.assertEqual(mock_post.call_count, 2)
+
+    def _projects(self):
+        """Build search data for two projects."""
+        return [
+            {'id': 1, 'name': 'Protein folding', 'description': 'Folding kinetics', 'files': []},
+            {'id': 2, 'name': 'Soil survey', 'description': 'Field samples', 'files': []}
+        ]
+
+    def test_embed_batch(self, mock_post):
+        """Test that texts are embedded in one request and cached."""
+        mock_post.return_value = make_response({'embeddings': [[1.0, 0.0], [0.0, 1.0]]})
+
+        result = self.ollama.embed_batch(['first', 'second'])
+
+        self.assertTrue(result['success'])
+        np.testing.assert_array_equal(result['embeddings'], [[1.0, 0.0], [0.0, 1.0]])
+        self.assertEqual(json.loads(mock_post.call_args[1]['data'])['input'], ['first', 'second'])
+        self.assertTrue(mock_post.call_args[0][0].endswith('/api/embed'))
+
+        # Only the new text is sent the second time
+        mock_post.return_value = make_response({'embeddings': [[0.5, 0.5]]})
+        result = self.ollama.embed_batch(['second', 'third'])
+
+        np.testing.assert_array_equal(result['embeddings'], [[0.0, 1.0], [0.5, 0.5]])
+        self.assertEqual(json.loads(mock_post.call_args[1]['data'])['input'], ['third'])
+
+    def test_rank_by_similarity(self, mock_post):
+        """Test that cosine similarities are scaled to 0-10 and filtered above 3."""
+        projects = [{'id': i} for i in range(4)]
+        embeddings = np.array([
+            [2.0, 0.0],   # query
+            [3.0, 0.0],   # same direction: 10
+            [1.0, 1.0],   # 45 degrees: 7.07
+            [1.0, 3.0],   # 3.16
+            [-1.0, 0.0]   # opposite: clamped to 0
+        ], dtype=np.float32)
+
+        results = self.ollama._rank_by_similarity(projects, embeddings)
+
+        self.assertEqual([result['project']['id'] for result in results], [0, 1, 2])
+        self.assertEqual([result['relevance_score'] for result in results], [10.0, 7.07, 3.16])
+
+        # Exactly 3 is not above the threshold
+        embeddings = np.array([[1.0, 0.0], [0.3, 0.9539392]], dtype=np.float32)
+        self.assertEqual(self.ollama._rank_by_similarity(projects[:1], embeddings), [])
+        mock_post.assert_not_called()
+
+    def test_search_projects_by_embedding(self, mock_post):
+        """Test that search ranks projects by embedding similarity."""
+        mock_post.return_value = make_response({'embeddings': [[1.0, 0.0], [0.6, 0.8], [0.0, 1.0]]})
+
+        result = self.ollama.search_projects('protein folding', self._projects())
+
+        self.assertTrue(result['success'])
+        self.assertEqual(len(result['results']), 1)
+        self.assertEqual(result['results'][0]['project']['id'], 1)
+        self.assertEqual(result['results'][0]['relevance_score'], 6.0)
+        self.assertEqual(mock_post.call_count, 1)
+
+    def test_search_projects_falls_back_to_generation(self, mock_post):
+        """Test that search asks the chat model when /api/embed fails."""
+        mock_post.side_effect = [
+            make_response(status_code=404),
+            make_response(lines=[{'response': '8', 'done': True}])
+        ]
+
+        with patch.object(OllamaIntegration, '_rank_by_generation', wraps=self.ollama._rank_by_generation) as mock_rank:
+            result = self.ollama.search_projects('protein folding', self._projects())
+
+        mock_rank.assert_called_once()
+        self.assertTrue(result['success'])
+        self.assertEqual(len(result['results']), 1)
+        self.assertEqual(result['results'][0]['project']['id'], 1)
+        self.assertEqual(result['results'][0]['relevance_score'], 8.0)
+        self.assertTrue(mock_post.call_args_list[0][0][0].endswith('/api/embed'))
+        self.assertEqual(mock_post.call_args_list[1][0][0], self.app.config['OLLAMA_API_URL'])
+
+    def _image_file(self, size):
+        """Write an image file of random bytes and return its path and contents."""
+        data = os.urandom(size)
+        fd, path = tempfile.mkstemp(suffix='.png')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        self.addCleanup(os.remove, path)
+        return path, data
+
+    def test_image_request_body(self, mock_post):
+        """Test that the streamed body decodes to the payload and the original image."""
+        payload = {'model': 'test-model', 'prompt': 'Describe "this" image', 'stream': False}
+        # Empty, smaller than a chunk, and spanning several chunks with a remainder
+        for size in (0, 1000, 3 * 64 * 1024 * 2 + 5):
+            path, data = self._image_file(size)
+
+            body = json.loads(b''.join(_image_request_body(payload, path)))
+
+            self.assertEqual(body['model'], 'test-model')
+            self.assertEqual(body['prompt'], 'Describe "this" image')
+            self.assertFalse(body['stream'])
+            self.assertEqual(len(body['images']), 1)
+            self.assertEqual(base64.b64decode(body['images'][0]), data)
+
+    def test_analyze_image_sends_image(self, mock_post):
+        """Test that analyze_image sends the image and caches the analysis."""
+        path, data = self._image_file(200000)
+        sent = []
+
+        def post(url, data, **kwargs):
+            # Consume the body as the session would
+            sent.append(b''.join(data))
+            return make_response({'response': 'A plot'})
+
+        mock_post.side_effect = post
+
+        self.assertEqual(self.ollama.analyze_image(path)['analysis'], 'A plot')
+        self.assertEqual(self.ollama.analyze_image(path)['analysis'], 'A plot')
+
+        self.assertEqual(len(sent), 1)
+        body = json.loads(sent[0])
+        self.assertEqual(body['model'], self.app.config['OLLAMA_MODEL'])
+        self.assertTrue(body['prompt'].startswith('Analyze this image'))
+        self.assertEqual(base64.b64decode(body['images'][0]), data)
+
+    def test_rank_by_generation_skips_unrelated_projects(self, mock_post):
+        """Test that only projects sharing a word with the query are scored."""
+        projects = self._projects() + [
+            {'id': 3, 'name': 'Notes', 'description': None, 'files': [
+                {'filename': 'results.txt', 'content': 'Measured PROTEIN yield'}
+            ]}
+        ]
+        project_texts = [f"Project: {project['name']}" for project in projects]
+        prompts = []
+
+        def post(url, data, **kwargs):
+            prompts.append(json.loads(data)['prompt'])
+            return make_response(lines=[{'response': '9', 'done': True}])
+
+        mock_post.side_effect = post
+
+        results = self.ollama._rank_by_generation('protein of interest', projects, project_texts)
+
+        # The soil survey shares no word with the query and is never sent
+        self.assertEqual(len(prompts), 2)
+        self.assertFalse(any('Soil survey' in prompt for prompt in prompts))
+        self.assertEqual(sorted(result['project']['id'] for result in results), [1, 3])
+        self.assertTrue(all(result['relevance_score'] == 9.0 for result in results))
+
+    def test_rank_by_generation_without_query_words(self, mock_post):
+        """Test that a query with no comparable words scores every project."""
+        mock_post.return_value = make_response(lines=[{'response': '5', 'done': True}])
+        projects = self._projects()
+
+        results = self.ollama._rank_by_generation('a b', projects, ['first', 'second'])
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(len(results), 2)
+
+    def test_extract_keywords(self, mock_post):
+        """Test that keywords are parsed from the reply, limited and cached."""
+        mock_post.return_value = make_response({'response': ' protein, folding ,, kinetics, assay'})
+
+        result = self.ollama.extract_keywords('Protein folding kinetics assay', max_keywords=3)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['keywords'], ['protein', 'folding', 'kinetics'])
+        self.assertIn('Protein folding kinetics assay', json.loads(mock_post.call_args[1]['data'])['prompt'])
+
+        self.ollama.extract_keywords('Protein folding kinetics assay', max_keywords=3)
+        self.assertEqual(mock_post.call_count, 1)
+
+    def test_extract_keywords_api_error(self, mock_post):
+        """Test that an API error is returned rather than raised."""
+        mock_post.return_value = make_response(status_code=500)
+
+        result = self.ollama.extract_keywords('Protein folding')
+
+        self.assertFalse(result['success'])
+        self.assertIn('500', result['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,8 +3,11 @@ import os
 import io
 import tempfile
 import json
+from datetime import datetime
 from unittest.mock import patch, MagicMock
 
+from sqlalchemy import inspect
+
 from app import create_app, db
 from app.models import User, Project, File, FileVersion
 from config import Config
@@ -606,6 +609,58 @@ class TestRoutes(unittest.TestCase):
         self.assertFalse(data['success'])
         self.assertEqual(data['message'], 'PDF generation failed')
 
+    @patch('app.latex_export.LatexExport.export_project_to_pdf')
+    def test_api_export_pdf_from_file(self, mock_export):
+        """Test exporting a PDF written to disk, which is removed after sending."""
+        self.login()
+        output_paths = []
+
+        def export(project, files, output_path=None):
+            output_paths.append(output_path)
+            with open(output_path, 'wb') as f:
+                f.write(b'%PDF-1.4 exported')
+            return {'success': True, 'pdf_path': output_path}
+
+        mock_export.side_effect = export
+
+        response = self.client.get(f'/api/projects/{self.test_project.id}/export/pdf')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'application/pdf')
+        self.assertEqual(response.data, b'%PDF-1.4 exported')
+        response.close()
+
+        # The export got its own output directory, removed with the response
+        self.assertEqual(len(output_paths), 1)
+        self.assertFalse(os.path.exists(os.path.dirname(output_paths[0])))
+
+    @patch('app.latex_export.LatexExport.export_project_to_pdf')
+    def test_api_export_pdf_file_order(self, mock_export):
+        """Test that the export gets the project's files newest first, RTF loaded."""
+        self.login()
+        project_id = self.test_project.id
+        older = File(
+            filename='older.txt',
+            file_path=os.path.join(TestConfig.UPLOAD_FOLDER, 'older.txt'),
+            file_type='text',
+            content='Older content',
+            rtf_content='{\\rtf1 Older content}',
+            updated_at=datetime(2020, 1, 1),
+            project_id=project_id
+        )
+        db.session.add(older)
+        db.session.commit()
+        db.session.expunge_all()
+
+        mock_export.return_value = {'success': True, 'pdf_content': b'Fake PDF content'}
+
+        response = self.client.get(f'/api/projects/{project_id}/export/pdf')
+        self.assertEqual(response.status_code, 200)
+
+        files = mock_export.call_args[0][1]
+        self.assertEqual([f.filename for f in files], ['test_file.txt', 'older.txt'])
+        self.assertNotIn('rtf_content', inspect(files[1]).unloaded)
+
     @patch('app.ollama_integration.OllamaIntegration.search_projects')
     def test_api_search(self, mock_search):
         """Test project search."""
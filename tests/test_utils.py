@@ -0,0 +1,71 @@
+import unittest
+import os
+import shutil
+import tempfile
+import importlib
+from unittest.mock import patch
+
+from app import create_app
+from app.utils import make_temp_dir
+import config
+from config import Config
+
+
+class TestConfig(Config):
+    """Test configuration."""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+
+class TestMakeTempDir(unittest.TestCase):
+    """Test cases for scratch directories."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.base = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        os.chmod(self.base, 0o700)
+        shutil.rmtree(self.base)
+        self.app_context.pop()
+
+    def _make(self, base):
+        """Make a scratch directory under base and return its parent."""
+        self.app.config['ELN_TMPFS_DIR'] = base
+        path = make_temp_dir()
+        self.addCleanup(shutil.rmtree, path, True)
+        self.assertTrue(os.path.isdir(path))
+        return os.path.dirname(path)
+
+    def test_configured_directory(self):
+        """Test that scratch directories are made in ELN_TMPFS_DIR."""
+        self.assertEqual(self._make(self.base), self.base)
+
+    def test_fallback_to_system_temp(self):
+        """Test the system temp directory is used for empty, missing or read-only settings."""
+        system_temp = tempfile.gettempdir()
+        self.assertEqual(self._make(''), system_temp)
+        self.assertEqual(self._make(os.path.join(self.base, 'missing')), system_temp)
+
+        if os.geteuid() != 0:
+            # root can write to read-only directories
+            os.chmod(self.base, 0o500)
+            self.assertEqual(self._make(self.base), system_temp)
+
+    def test_read_from_environment(self):
+        """Test that ELN_TMPFS_DIR is read from the environment."""
+        try:
+            with patch.dict(os.environ, {'ELN_TMPFS_DIR': self.base}):
+                self.assertEqual(importlib.reload(config).Config.ELN_TMPFS_DIR, self.base)
+            with patch.dict(os.environ, {'ELN_TMPFS_DIR': ''}):
+                self.assertEqual(importlib.reload(config).Config.ELN_TMPFS_DIR, '')
+        finally:
+            importlib.reload(config)
+
+
+if __name__ == '__main__':
+    unittest.main()